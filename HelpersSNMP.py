@@ -1,37 +1,96 @@
 # app/helpers.py
+import os
 import uuid
 import time
+import random
+from array import array
 from datetime import datetime, timezone
 from typing import Tuple, Dict
 from flask import request, jsonify
 
-# pysnmp
-from pysnmp.hlapi import (
-    CommunityData, UsmUserData,
-    usmNoAuthProtocol, usmHMACSHAAuthProtocol, usmHMACMD5AuthProtocol,
-    usmNoPrivProtocol, usmAesCfb128Protocol,
-    ObjectType, ObjectIdentity
-)
-from pysnmp.smi import builder, view
-
 from .config import (
-    APP_ID_ENV, USE_DUMMY, EXPOSE_COMMUNITY, MIB_DIR
+    APP_ID_ENV, USE_DUMMY, EXPOSE_COMMUNITY, MIB_DIR, MIB_CACHE_SIZE,
+    MIB_INDEX_ON_START, MIB_INDEX_CACHE, USM_CACHE_SIZE, USM_ENGINE_ID_TTL, FIRESTORE_ASYNC, FIRESTORE_QUEUE_MAX, FIRESTORE_FLUSH_SIZE,
+    FIRESTORE_FLUSH_INTERVAL, FIRESTORE_QUEUE_POLICY, FIRESTORE_COLLECTION
 )
+from .mibcache import OidResolver
+from .usm import UsmContextCache
+from .writer import BatchWriter, batched_sink, per_item_sink
+from .metrics import STAGE_SECONDS, STAGE_FIRESTORE
+from .log import get_logger, bind_request_id
+from .lazy import Lazy, LazyModule
 
-# Optional Firestore (dibiarkan eksternal)
-try:
-    from firebase_backend import save_sensor_data_to_cloud
-    print("[import] firebase_backend loaded ✅")
-except Exception as e:
-    save_sensor_data_to_cloud = None
-    print("[import] firebase_backend not available -> Firestore disabled. Reason:", e)
+log = get_logger("helpers")
 
-# ---------- MIB init ----------
-mibBuilder = builder.MibBuilder()
-import os
-if os.path.isdir(MIB_DIR):
-    mibBuilder.addMibSources(builder.DirMibSource(MIB_DIR))
-mibView = view.MibViewController(mibBuilder)
+# pysnmp di-import saat pertama dipakai (lihat app/lazy.py)
+hlapi = LazyModule("pysnmp.hlapi")
+smi_builder = LazyModule("pysnmp.smi.builder")
+smi_view = LazyModule("pysnmp.smi.view")
+
+# ---------- Optional Firestore (dibiarkan eksternal) ----------
+def _server_timestamp():
+    try:
+        from google.cloud.firestore import SERVER_TIMESTAMP
+        return SERVER_TIMESTAMP
+    except ImportError:
+        return None
+
+def _firestore_doc(payload: Dict, server_ts=None) -> Dict:
+    """Isi dokumen sensor-readings: meta + rows (dashboard mengurutkan by serverTimestamp)."""
+    doc = dict(payload)
+    doc["serverTimestamp"] = server_ts if server_ts is not None else datetime.now(timezone.utc)
+    return doc
+
+def _make_firestore_sink(save_fn, client=None):
+    """
+    Sink batch untuk BatchWriter. Kalau ada klien Firestore (`client.batch()`), semua item
+    hasil drain ditulis lewat WriteBatch; kalau tidak, per dokumen lewat `save_fn`.
+    Bisa diganti fake lokal saat testing.
+    """
+    if client is not None and hasattr(client, "batch"):
+        server_ts = _server_timestamp()
+        return batched_sink(client, FIRESTORE_COLLECTION.format(app_id=APP_ID_ENV),
+                            lambda payload: _firestore_doc(payload, server_ts))
+    return per_item_sink(lambda payload: save_fn(payload, app_id=APP_ID_ENV))
+
+def _load_firestore():
+    """(save_fn, writer). Google SDK baru dimuat saat simpan pertama, bukan saat import."""
+    try:
+        import firebase_backend
+        save_sensor_data_to_cloud = firebase_backend.save_sensor_data_to_cloud
+        log.info("firebase_backend loaded")
+    except Exception as e:
+        log.warning("firebase_backend not available, Firestore disabled", extra={"reason": str(e)})
+        return None, None
+    writer = None
+    if FIRESTORE_ASYNC:
+        writer = BatchWriter(
+            _make_firestore_sink(save_sensor_data_to_cloud, getattr(firebase_backend, "db", None)),
+            max_queue=FIRESTORE_QUEUE_MAX, flush_size=FIRESTORE_FLUSH_SIZE,
+            flush_interval=FIRESTORE_FLUSH_INTERVAL, policy=FIRESTORE_QUEUE_POLICY,
+        )
+    return save_sensor_data_to_cloud, writer
+
+firestore = Lazy("firestore", _load_firestore)
+
+def firestore_queue_stats():
+    """Stats antrian Firestore; None kalau belum dimuat / nonaktif (tidak memicu load)."""
+    writer = (firestore.peek() or (None, None))[1]
+    return writer.stats() if writer else None
+
+# ---------- MIB init (lazy) ----------
+def _build_mib_view():
+    mibBuilder = smi_builder.MibBuilder()
+    if os.path.isdir(MIB_DIR):
+        mibBuilder.addMibSources(smi_builder.DirMibSource(MIB_DIR))
+    return smi_view.MibViewController(mibBuilder)
+
+oid_resolver = OidResolver(
+    _build_mib_view, maxsize=MIB_CACHE_SIZE, index_on_load=MIB_INDEX_ON_START,
+    index_path=MIB_INDEX_CACHE, mib_dir=MIB_DIR,
+)
+usm_cache = UsmContextCache(max_entries=USM_CACHE_SIZE, engine_id_ttl=USM_ENGINE_ID_TTL)
+mib_index = Lazy("mib", oid_resolver.ensure_index)  # supaya ikut warm_up()/stats()
 
 # ---------- OID Template ----------
 PROTOCOL_TEMPLATE: Dict[str, Dict] = {
@@ -41,10 +100,20 @@ PROTOCOL_TEMPLATE: Dict[str, Dict] = {
     "1.3.6.1.4.1.9999.1.2.3": {"name": "current",     "unit": "A",   "category": "power",       "decimals": 2},
 }
 
+# Range nilai dummy per OID template
+DUMMY_RANGES: Dict[str, Tuple[float, float]] = {
+    "1.3.6.1.4.1.9999.1.2.0": (20.0, 30.0),
+    "1.3.6.1.4.1.9999.1.2.1": (40.0, 70.0),
+    "1.3.6.1.4.1.9999.1.2.2": (700.0, 800.0),
+    "1.3.6.1.4.1.9999.1.2.3": (0.5, 2.0),
+}
+
 # ---------- Helpers ----------
 def _get_request_id() -> str:
     rid = request.headers.get("X-Request-Id") if request else None
-    return rid or str(uuid.uuid4())
+    rid = rid or str(uuid.uuid4())
+    bind_request_id(rid)  # log berikutnya di request ini membawa requestId
+    return rid
 
 def _error(code: int, message: str, request_id: str, details: dict | None = None):
     payload = {"error": {"code": code, "message": message}}
@@ -67,11 +136,110 @@ def _validate_v3(v3: dict) -> Tuple[bool, str]:
         return False, "Priv protocol set but no privKey."
     return True, ""
 
-def _security(version_str: str, community: str, v3: dict):
+def _parse_snmp_body(data: dict):
+    """
+    Validasi body /snmp (dipakai blueprint sync & async).
+    Return (params, None) atau (None, (http_code, message)).
+    """
+    try:
+        operation = (data.get("operation") or "").lower()
+        ip        = data.get("ip")
+        oid       = data.get("oid", "")
+        oids      = data.get("oids")
+        setValue  = data.get("setValue")
+        port      = int(data.get("port", 161))
+        version   = (data.get("version") or "v2c").lower()
+        community = data.get("community", "public")
+        v3_cfg    = data.get("v3") or {}
+        page_size = None if data.get("pageSize") is None else int(data["pageSize"])
+    except Exception as e:
+        return None, (400, f"Bad request: {e}")
+
+    # 'oid' boleh list, atau pakai 'oids' (hanya untuk GET)
+    if isinstance(oid, list):
+        oids = oid
+    if oids is not None:
+        if not isinstance(oids, list):
+            return None, (400, "'oids' must be a list")
+        oids = [str(o).strip() for o in oids if str(o).strip()]
+        oid = oids[0] if oids else ""
+
+    if not oid or not str(oid).strip():
+        return None, (400, "Missing or empty 'oid'")
+    if operation not in ("get", "getnext", "walk", "set"):
+        return None, (400, "Invalid operation")
+    if oids is not None and operation != "get" and len(oids) > 1:
+        return None, (400, "Multiple OIDs are only supported for 'get'")
+    if version == "v3":
+        ok, msg = _validate_v3(v3_cfg)
+        if not ok:
+            return None, (400, msg)
+    elif not all([operation, ip, oid, community]):
+        return None, (400, "Missing required parameters")
+
+    return {
+        "operation": operation, "ip": ip, "oid": oid, "oids": oids,
+        "get_oids": (oids or [oid]) if operation == "get" else [oid],
+        "setValue": setValue, "port": port, "version": version,
+        "community": community, "v3": v3_cfg, "page_size": page_size,
+    }, None
+
+def _dummy_results(operation: str, oid: str, get_oids, setValue):
+    """Hasil DUMMY MODE. Return (results, None) atau (None, (http_code, message))."""
+    results = []
+    rf = lambda a, b: f"{random.uniform(a, b):.2f}"
+
+    if oid.startswith("1.3.6.1.4.1.9999.1.2") or ("9999.1.2" in oid):
+        if operation == "walk":
+            results = [
+                {"oid": "1.3.6.1.4.1.9999.1.2.0", "name": "temperature", "value": rf(20.0, 30.0),  "type": "Float"},
+                {"oid": "1.3.6.1.4.1.9999.1.2.1", "name": "humidity",    "value": rf(40.0, 70.0),  "type": "Float"},
+                {"oid": "1.3.6.1.4.1.9999.1.2.2", "name": "voltage",     "value": rf(700.0, 800.0),"type": "Float"},
+                {"oid": "1.3.6.1.4.1.9999.1.2.3", "name": "current",     "value": rf(0.5, 2.0),    "type": "Float"},
+            ]
+        elif operation == "get":
+            for o in get_oids:
+                if "9999.1.2" not in o:
+                    return None, (404, "Dummy Agent does not recognize this OID")
+                tpl = PROTOCOL_TEMPLATE.get(o, {})
+                results.append({"oid": o, "name": tpl.get("name", "temperature"),
+                                "value": rf(*DUMMY_RANGES.get(o, (20.0, 30.0))), "type": "Float"})
+        elif operation == "getnext":
+            results = [{"oid": oid, "name": "humidity", "value": rf(40.0, 70.0), "type": "Float"}]
+        elif operation == "set":
+            if not setValue:
+                return None, (400, "SET requires 'setValue'")
+            results = [{"oid": oid, "name": "dummySet", "value": f"Value set to: {setValue}", "type": "OctetString"}]
+    else:
+        return None, (404, "Dummy Agent does not recognize this OID")
+
+    for r in results:
+        r["dummy"] = True
+    return results, None
+
+# Nama di body request -> nama simbol protokol di pysnmp.hlapi (di-resolve lazy)
+AUTH_PROTOCOLS = {
+    "NONE": "usmNoAuthProtocol",
+    "SHA":  "usmHMACSHAAuthProtocol",
+    "MD5":  "usmHMACMD5AuthProtocol",
+}
+
+PRIV_PROTOCOLS = {
+    "NONE":   "usmNoPrivProtocol",
+    "AES128": "usmAesCfb128Protocol",
+}
+
+def _usm_protocols(auth_proto: str, priv_proto: str):
+    """('SHA', 'AES128') -> objek protokol pysnmp; nama yang tidak dikenal = NONE."""
+    return (getattr(hlapi, AUTH_PROTOCOLS.get(auth_proto, AUTH_PROTOCOLS["NONE"])),
+            getattr(hlapi, PRIV_PROTOCOLS.get(priv_proto, PRIV_PROTOCOLS["NONE"])))
+
+def _security(version_str: str, community: str, v3: dict, target: Tuple[str, int] | None = None):
+    """`target` (ip, port) dipakai memilih key v3 yang sudah dilokalisasi untuk engineID agent."""
     vs = (version_str or "v2c").lower()
     if vs in ("v1", "v2c"):
         mp = 0 if vs == "v1" else 1
-        return CommunityData(community, mpModel=mp)
+        return hlapi.CommunityData(community, mpModel=mp)
 
     user = (v3 or {}).get("user", "")
     authProto = (v3 or {}).get("authProto", "NONE").upper()
@@ -79,33 +247,33 @@ def _security(version_str: str, community: str, v3: dict):
     authKey = (v3 or {}).get("authKey", "")
     privKey = (v3 or {}).get("privKey", "")
 
-    auth_p = {
-        "NONE": usmNoAuthProtocol,
-        "SHA":  usmHMACSHAAuthProtocol,
-        "MD5":  usmHMACMD5AuthProtocol,
-    }.get(authProto, usmNoAuthProtocol)
-
-    priv_p = {
-        "NONE":   usmNoPrivProtocol,
-        "AES128": usmAesCfb128Protocol,
-    }.get(privProto, usmNoPrivProtocol)
-
-    if auth_p is usmNoAuthProtocol and priv_p is usmNoPrivProtocol:
-        return UsmUserData(user)
-    elif priv_p is usmNoPrivProtocol:
-        return UsmUserData(user, authKey, authProtocol=auth_p)
-    else:
-        return UsmUserData(user, authKey, privKey, authProtocol=auth_p, privProtocol=priv_p)
+    auth_p, priv_p = _usm_protocols(authProto, privProto)
 
-def _parse_object_identity(oid_str: str) -> ObjectType:
+    return usm_cache.user_data(user, auth_p, priv_p, authKey, privKey, target)
+
+def _parse_object_identity(oid_str: str) -> "hlapi.ObjectType":
     if any(c.isalpha() for c in oid_str):
         if "::" in oid_str:
             left, right = oid_str.split("::", 1)
             parts = right.split(".")
             symbol = parts[0]
             indexes = [int(p) for p in parts[1:] if p.isdigit()]
-            return ObjectType(ObjectIdentity(left, symbol, *indexes).resolveWithMib(mibView))
-    return ObjectType(ObjectIdentity(oid_str))
+            base = oid_resolver.symbol_to_oid(left, symbol)
+            if base is not None:
+                return hlapi.ObjectType(hlapi.ObjectIdentity(base + tuple(indexes)))
+            return hlapi.ObjectType(hlapi.ObjectIdentity(left, symbol, *indexes).resolveWithMib(oid_resolver.mib_view))
+    return hlapi.ObjectType(hlapi.ObjectIdentity(oid_str))
+
+def _varbind_to_result(oid_result, val_result) -> Dict:
+    oid_str = str(oid_result)
+    # Resolve MIB name bila tersedia (index + LRU, fallback ke OID string)
+    name = oid_resolver.oid_to_name(oid_str)
+    return {
+        "oid": oid_str,
+        "name": name,
+        "value": str(val_result),
+        "type": val_result.__class__.__name__,
+    }
 
 def _to_number(v):
     try:
@@ -115,26 +283,81 @@ def _to_number(v):
     except Exception:
         return None
 
-def _normalize_rows(results, ip, port):
+def _to_numbers(values):
+    """Konversi massal ke float; None untuk nilai non-numerik (semantik sama dengan _to_number)."""
+    try:
+        # fast path: semua nilai numerik -> satu kali map(float) ke array('d')
+        return array("d", map(float, values))
+    except (TypeError, ValueError):
+        return [_to_number(v) for v in values]
+
+class NormalizedBatch:
+    """
+    Hasil normalisasi dalam bentuk kolom. Dict per row baru dibuat kalau
+    `rows()` dipanggil (mis. untuk respons JSON biasa / Firestore).
+    """
+    __slots__ = ("ts", "ip", "port", "oid", "name", "value", "unit", "type", "category", "_rows")
+
+    def __init__(self, ts, ip, port, oid, name, value, unit, type_, category):
+        self.ts, self.ip, self.port = ts, ip, port
+        self.oid, self.name, self.value = oid, name, value
+        self.unit, self.type, self.category = unit, type_, category
+        self._rows = None
+
+    def __len__(self):
+        return len(self.oid)
+
+    @property
+    def constants(self) -> Dict:
+        return {"ts": self.ts, "ip": self.ip, "port": self.port, "source": "backend"}
+
+    def column(self, field: str):
+        if field in ("ts", "ip", "port", "source"):
+            return [self.constants[field]] * len(self)
+        return getattr(self, field)
+
+    def rows(self):
+        if self._rows is None:
+            ts, ip, port = self.ts, self.ip, self.port
+            self._rows = [
+                {"name": n, "oid": o, "value": v, "unit": u, "type": t, "category": c,
+                 "ts": ts, "ip": ip, "port": port, "source": "backend"}
+                for n, o, v, u, t, c in zip(self.name, self.oid, self.value, self.unit, self.type, self.category)
+            ]
+        return self._rows
+
+def _normalize_batch(results, ip, port) -> NormalizedBatch:
+    """Versi batch dari _normalize_rows: konversi angka sekaligus, rounding per grup decimals."""
+    results = results or []
     ts = datetime.now(timezone.utc).isoformat()
-    out = []
-    for r in results or []:
-        oid = r.get("oid")
-        tpl = PROTOCOL_TEMPLATE.get(oid, {})
-        name = r.get("name") or tpl.get("name") or oid
-        unit = tpl.get("unit", "")
-        category = tpl.get("category", "misc")
-        t = r.get("type", "")
-
-        num = _to_number(r.get("value"))
-        value_out = r.get("value") if num is None else round(num, int(tpl.get("decimals", 2)))
-
-        out.append({
-            "name": name, "oid": oid, "value": value_out, "unit": unit,
-            "type": t, "category": category, "ts": ts, "ip": ip, "port": port,
-            "source": "backend",
-        })
-    return out
+    n = len(results)
+    oids = [r.get("oid") for r in results]
+    raw = [r.get("value") for r in results]
+    types = [r.get("type", "") for r in results]
+    names = [r.get("name") or o for r, o in zip(results, oids)]
+    units = [""] * n
+    categories = ["misc"] * n
+
+    nums = _to_numbers(raw)
+    # mayoritas OID tidak ada di template -> decimals default 2
+    values = [v if x is None else round(x, 2) for x, v in zip(nums, raw)]
+
+    # template hanya untuk sedikit OID: cek irisan set dulu sebelum loop per row
+    known = PROTOCOL_TEMPLATE.keys() & set(oids)
+    for i, oid in enumerate(oids if known else ()):
+        tpl = PROTOCOL_TEMPLATE.get(oid)
+        if tpl is None:
+            continue
+        names[i] = tpl.get("name") or results[i].get("name") or oid  # nama template menang
+        units[i] = tpl.get("unit", "")
+        categories[i] = tpl.get("category", "misc")
+        if nums[i] is not None:
+            values[i] = round(nums[i], int(tpl.get("decimals", 2)))
+
+    return NormalizedBatch(ts, ip, port, oids, names, values, units, types, categories)
+
+def _normalize_rows(results, ip, port):
+    return _normalize_batch(results, ip, port).rows()
 
 def _make_meta(ip, operation, oid, version, community, port):
     meta = {
@@ -148,10 +371,23 @@ def _make_meta(ip, operation, oid, version, community, port):
     return meta
 
 def _save_to_firestore(meta: Dict, results, rows):
+    with STAGE_SECONDS.time(STAGE_FIRESTORE):
+        return _save_to_firestore_impl(meta, results, rows)
+
+def _save_to_firestore_impl(meta: Dict, results, rows):
+    save_sensor_data_to_cloud, firestore_writer = firestore.get()
     if not save_sensor_data_to_cloud:
-        print("[firebase] skipped (module not available)")
+        log.debug("firestore save skipped (module not available)")
         return False, "disabled"
-    payload = {**meta, "results": results, "rows": rows}
+    if isinstance(rows, NormalizedBatch):
+        rows = rows.rows()
+    # rows sudah memuat oid/name/value/type dari results -> results tidak ikut disimpan ulang
+    payload = {**meta, "rows": rows} if rows else {**meta, "results": results}
+    if firestore_writer is not None:
+        # Tidak menunggu cloud write; dikirim batch oleh background thread
+        if firestore_writer.submit(payload):
+            return True, "queued"
+        return False, "dropped (queue full)"
     ok, msg = save_sensor_data_to_cloud(payload, app_id=APP_ID_ENV)
-    print("[firebase]", ok, "-", msg)
+    log.debug("firestore save", extra={"ok": ok, "detail": msg})
     return ok, msg
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+# benchSNMP.py
+"""
+Benchmark backend SNMP.
+
+    python benchSNMP.py normalize --rows 50000
+    python benchSNMP.py e2e --start-agent --start-api --start-flaskapi --concurrency 1,8,32 -o bench.json
+    python benchSNMP.py compare old.json new.json
+    python benchSNMP.py traps --count 50000 --rate 5000 --api-url http://127.0.0.1:8000
+    python benchSNMP.py coldstart --runs 5 --target-ms 300 --warm-up
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import resource
+import shlex
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, urlencode
+
+
+def _normalize_rows_legacy(results, ip, port):
+    """Implementasi per-row sebelum _normalize_batch (baseline pembanding)."""
+    from app.helpers import PROTOCOL_TEMPLATE, _to_number
+
+    ts = datetime.now(timezone.utc).isoformat()
+    out = []
+    for r in results or []:
+        oid = r.get("oid")
+        tpl = PROTOCOL_TEMPLATE.get(oid, {})
+        name = r.get("name") or tpl.get("name") or oid
+        unit = tpl.get("unit", "")
+        category = tpl.get("category", "misc")
+        t = r.get("type", "")
+
+        num = _to_number(r.get("value"))
+        value_out = r.get("value") if num is None else round(num, int(tpl.get("decimals", 2)))
+
+        out.append({
+            "name": name, "oid": oid, "value": value_out, "unit": unit,
+            "type": t, "category": category, "ts": ts, "ip": ip, "port": port,
+            "source": "backend",
+        })
+    return out
+
+
+def _fake_walk(n, text_ratio=0.0):
+    """Hasil walk sintetis mirip ifTable: Counter32 + sebagian OctetString."""
+    results = []
+    for i in range(n):
+        oid = f"1.3.6.1.2.1.2.2.1.{10 + i % 8}.{i // 8 + 1}"
+        if random.random() < text_ratio:
+            results.append({"oid": oid, "name": oid, "value": f"eth{i}", "type": "OctetString"})
+        else:
+            results.append({"oid": oid, "name": oid, "value": str(random.randint(0, 2**32 - 1)), "type": "Counter32"})
+    return results
+
+
+def _rate(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_normalize(args):
+    # app.* hanya dibutuhkan subcommand ini dan traps; subcommand lain jalan tanpa paket app
+    from app.helpers import _normalize_batch
+
+    results = _fake_walk(args.rows, args.text_ratio)
+    legacy = _rate(lambda: _normalize_rows_legacy(results, "127.0.0.1", 161), args.repeat)
+    batch_rows = _rate(lambda: _normalize_batch(results, "127.0.0.1", 161).rows(), args.repeat)
+    batch_lazy = _rate(lambda: _normalize_batch(results, "127.0.0.1", 161), args.repeat)
+    report = {
+        "rows": args.rows,
+        "textRatio": args.text_ratio,
+        "rowsPerSec": {
+            "legacy": round(args.rows / legacy),
+            "batch": round(args.rows / batch_rows),
+            "batchLazy": round(args.rows / batch_lazy),
+        },
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+# ---------- end-to-end ----------
+# Backend tidak punya entrypoint sendiri (blueprint didaftarkan app host); untuk benchmark
+# cukup app Flask minimal dengan snmp_bp.
+API_BOOT = (
+    "import sys\n"
+    "from flask import Flask\n"
+    "from app.routes_snmp import snmp_bp\n"
+    "app = Flask('bench')\n"
+    "app.register_blueprint(snmp_bp)\n"
+    "app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)\n"
+)
+
+IF_IN_OCTETS = "1.3.6.1.2.1.2.2.1.10"
+SYS_UPTIME = "1.3.6.1.2.1.1.3.0"
+SYS_CONTACT = "1.3.6.1.2.1.1.4.0"
+
+
+def _percentile(sorted_values, p):
+    """Nearest-rank percentile dari list yang sudah terurut."""
+    if not sorted_values:
+        return None
+    k = math.ceil(p / 100.0 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, k))]
+
+
+def _rss_kb(pid):
+    """VmRSS proses (Linux /proc); None kalau tidak tersedia."""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def _wait_http(url, timeout=30.0):
+    u = urlsplit(url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(u.hostname, u.port, timeout=1)
+            conn.request("GET", u.path or "/")
+            conn.getresponse().read()
+            conn.close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def _spawn(cmd, env=None):
+    # session sendiri supaya child (mis. reloader Flask debug) ikut dimatikan
+    return subprocess.Popen(
+        cmd, env={**os.environ, **(env or {})}, start_new_session=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def _stop(proc):
+    if proc is None or proc.poll() is not None:
+        return
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=5)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(proc.pid, signal.SIGKILL)
+
+
+def _scenarios(args):
+    """nama -> (base_url, method, path, body)."""
+    base = {"ip": args.agent_host, "port": args.agent_port, "version": "v2c", "community": args.community}
+    return {
+        "get": (args.api_url, "POST", "/snmp", {**base, "operation": "get", "oid": SYS_UPTIME}),
+        "walk": (args.api_url, "POST", "/snmp", {**base, "operation": "walk", "oid": IF_IN_OCTETS,
+                                                 "includeResults": False}),
+        "set": (args.api_url, "POST", "/snmp", {**base, "operation": "set", "oid": SYS_CONTACT,
+                                                "setValue": "bench"}),
+        "ping": (args.api_url, "GET", "/ping-agent?" + urlencode(
+            {"ip": args.agent_host, "port": args.agent_port, "community": args.community}), None),
+        "flaskapi": (args.flaskapi_url, "GET", "/api/snmp/data", None),
+    }
+
+
+def _drive(base_url, method, path, body, concurrency, total, timeout):
+    """Kirim `total` request dengan `concurrency` worker; return (latencies_s, errors, wall_s)."""
+    u = urlsplit(base_url)
+    payload = json.dumps(body).encode() if body is not None else None
+    headers = {"Content-Type": "application/json"} if payload else {}
+    remaining = [total]
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def worker():
+        conn = http.client.HTTPConnection(u.hostname, u.port, timeout=timeout)
+        local, failed = [], 0
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            t0 = time.perf_counter()
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status >= 400:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()  # dibuka ulang otomatis pada request berikutnya
+            local.append(time.perf_counter() - t0)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0], time.perf_counter() - t0
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_e2e(args):
+    procs = {}
+    try:
+        if args.start_agent:
+            procs["agent"] = _spawn([sys.executable, args.agent_script, "--ports", str(args.agent_port)]
+                                    + shlex.split(args.agent_args))
+            time.sleep(args.agent_startup)
+        if args.start_api:
+            procs["api"] = _spawn([sys.executable, "-c", API_BOOT, str(urlsplit(args.api_url).port)],
+                                  env={"DUMMY_MODE": "0", "LOG_LEVEL": "WARNING", "SCHEDULER_ENABLED": "0",
+                                       "SNMP_CACHE_TTL": str(args.cache_ttl), "SNMP_CACHE_TTL_BY_OID": ""})
+            if not _wait_http(args.api_url + "/health"):
+                raise SystemExit("backend API tidak bisa dihubungi")
+        if args.start_flaskapi:
+            procs["flaskapi"] = _spawn([sys.executable, args.flaskapi_script],
+                                       env={"FLASKAPI_CACHE_TTL": str(args.cache_ttl)})
+            if not _wait_http(args.flaskapi_url + "/api/health"):
+                raise SystemExit("flaskapi tidak bisa dihubungi")
+
+        scenarios = _scenarios(args)
+        names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+        levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+        results = []
+        for name in names:
+            base_url, method, path, body = scenarios[name]
+            if args.warmup:
+                _drive(base_url, method, path, body, 1, args.warmup, args.timeout)
+            for c in levels:
+                lat, errors, wall = _drive(base_url, method, path, body, c, args.requests, args.timeout)
+                lat.sort()
+                item = {
+                    "scenario": name, "concurrency": c, "requests": len(lat), "errors": errors,
+                    "rps": round(len(lat) / wall, 1) if wall else None,
+                    "latencyMs": {
+                        "p50": round(_percentile(lat, 50) * 1000, 3),
+                        "p95": round(_percentile(lat, 95) * 1000, 3),
+                        "p99": round(_percentile(lat, 99) * 1000, 3),
+                        "max": round(lat[-1] * 1000, 3),
+                        "mean": round(sum(lat) / len(lat) * 1000, 3),
+                    } if lat else None,
+                    "rssKb": {k: _rss_kb(p.pid) for k, p in procs.items()},
+                }
+                results.append(item)
+                ms = item["latencyMs"]
+                if ms is None:
+                    print(f"{name:9s} c={c:<4d} no completed requests errors={errors}")
+                    continue
+                print(f"{name:9s} c={c:<4d} rps={item['rps']!s:<9} p50={ms['p50']}ms "
+                      f"p95={ms['p95']}ms p99={ms['p99']}ms errors={errors}")
+    finally:
+        for p in procs.values():
+            _stop(p)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "apiUrl": args.api_url, "flaskapiUrl": args.flaskapi_url,
+            "agent": f"{args.agent_host}:{args.agent_port}", "agentArgs": args.agent_args,
+            "requests": args.requests, "concurrency": levels, "warmup": args.warmup,
+            # hanya berlaku untuk proses yang dijalankan bench ini (--start-api / --start-flaskapi)
+            "cacheTtl": args.cache_ttl if (args.start_api or args.start_flaskapi) else None,
+        },
+        "clientMaxRssKb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved {args.output}")
+    return report
+
+
+def bench_compare(args):
+    """Bandingkan dua file hasil e2e: selisih rps dan p95 per (scenario, concurrency)."""
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    before = {(r["scenario"], r["concurrency"]): r for r in old["results"]}
+    print(f"{old.get('commit')} -> {new.get('commit')}")
+    ttl_old, ttl_new = (r.get("config", {}).get("cacheTtl") for r in (old, new))
+    if ttl_old != ttl_new:
+        print(f"WARNING: cache TTL berbeda ({ttl_old} vs {ttl_new}), angka tidak sebanding")
+    for r in new["results"]:
+        o = before.get((r["scenario"], r["concurrency"]))
+        if not o or not o.get("latencyMs") or not r.get("latencyMs"):
+            continue
+        d_rps = (r["rps"] - o["rps"]) / o["rps"] * 100 if o["rps"] else 0.0
+        d_p95 = (r["latencyMs"]["p95"] - o["latencyMs"]["p95"]) / o["latencyMs"]["p95"] * 100 \
+            if o["latencyMs"]["p95"] else 0.0
+        print(f"{r['scenario']:9s} c={r['concurrency']:<4d} rps {o['rps']} -> {r['rps']} ({d_rps:+.1f}%)  "
+              f"p95 {o['latencyMs']['p95']} -> {r['latencyMs']['p95']}ms ({d_p95:+.1f}%)")
+
+
+def _encode_trap(community, varbinds):
+    """Satu pesan SNMPv2c TRAP ter-encode (dikirim ulang apa adanya oleh bench_traps)."""
+    from pyasn1.codec.ber import encoder
+    from pysnmp.proto import api
+
+    p_mod = api.protoModules[api.protoVersion2c]
+    pdu = p_mod.TrapPDU()
+    p_mod.apiTrapPDU.setDefaults(pdu)
+    # default v2c: [sysUpTime.0, snmpTrapOID.0=coldStart]; snmpTrapOID diganti milik caller
+    p_mod.apiTrapPDU.setVarBinds(pdu, p_mod.apiTrapPDU.getVarBinds(pdu)[:1] + varbinds)
+    msg = p_mod.Message()
+    p_mod.apiMessage.setDefaults(msg)
+    p_mod.apiMessage.setCommunity(msg, community)
+    p_mod.apiMessage.setPDU(msg, pdu)
+    return encoder.encode(msg)
+
+
+def _get_json(url, timeout=5.0):
+    u = urlsplit(url)
+    conn = http.client.HTTPConnection(u.hostname, u.port, timeout=timeout)
+    conn.request("GET", u.path + (f"?{u.query}" if u.query else ""))
+    body = conn.getresponse().read()
+    conn.close()
+    return json.loads(body)
+
+
+def bench_traps(args):
+    """Kirim trap v2c ke receiver lokal dengan laju tetap, lalu bandingkan dengan stats receiver."""
+    from pysnmp.proto import rfc1902
+    from app.helpers import PROTOCOL_TEMPLATE
+
+    oids = list(PROTOCOL_TEMPLATE.keys())
+    varbinds = [
+        (rfc1902.ObjectName("1.3.6.1.6.3.1.1.4.1.0"), rfc1902.ObjectName("1.3.6.1.6.3.1.1.5.3")),  # linkDown
+    ] + [(rfc1902.ObjectName(o), rfc1902.OctetString(f"{random.uniform(0, 100):.2f}")) for o in oids]
+    wire = _encode_trap(args.community, varbinds)
+
+    before = _get_json(args.api_url + "/health")["traps"] if args.api_url else None
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    target = (args.host, args.port)
+    interval = 1.0 / args.rate if args.rate > 0 else 0.0
+    t0 = time.perf_counter()
+    for i in range(args.count):
+        sock.sendto(wire, target)
+        if interval:
+            # pacing per 100 pesan supaya overhead sleep tidak mendominasi
+            if i % 100 == 99:
+                delay = t0 + (i + 1) * interval - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+    elapsed = time.perf_counter() - t0
+    sock.close()
+
+    report = {"sent": args.count, "seconds": round(elapsed, 3), "sendRate": round(args.count / elapsed)}
+    if args.api_url:
+        time.sleep(args.settle)
+        after = _get_json(args.api_url + "/health")["traps"]
+        received = after["received"] - before["received"]
+        report["receiver"] = {
+            "received": received,
+            "delivered": after["delivered"] - before["delivered"],
+            "dropped": after["dropped"] - before["dropped"],
+            "lostBeforeReceiver": args.count - received,  # hilang di kernel/UDP
+        }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+# ---------- cold start ----------
+# Modul berat yang seharusnya TIDAK ikut ter-import saat import app (dimuat lazy).
+HEAVY_MODULES = ("pysnmp", "pyasn1", "firebase_backend", "firebase_admin", "google", "numpy")
+
+COLD_BOOT = (
+    "import sys, time, json, importlib\n"
+    "t0 = time.perf_counter()\n"
+    "importlib.import_module(sys.argv[1])\n"
+    "t1 = time.perf_counter()\n"
+    "heavy = sorted({m.split('.')[0] for m in sys.modules} & set(sys.argv[3].split(',')))\n"
+    "loaded = {}\n"
+    "if sys.argv[2] == '1':\n"
+    "    from app.lazy import warm_up\n"
+    "    loaded = warm_up()\n"
+    "t2 = time.perf_counter()\n"
+    "print(json.dumps({'importMs': (t1 - t0) * 1000, 'warmUpMs': (t2 - t1) * 1000,\n"
+    "                  'heavy': heavy, 'warmUp': loaded}))\n"
+)
+
+
+def _parse_importtime(stderr):
+    """Baris `python -X importtime` -> [(module, self_us, cumulative_us)]."""
+    out = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        out.append((name.strip(), int(self_us), int(cum_us)))
+    return out
+
+
+def _summary_ms(values):
+    v = sorted(values)
+    return {"p50": round(_percentile(v, 50), 1), "min": round(v[0], 1), "max": round(v[-1], 1)}
+
+
+def bench_coldstart(args):
+    """
+    Waktu import app di proses baru (dingin), modul berat yang ikut ter-import, dan
+    top modul dari `-X importtime`. Exit 1 kalau p50 import melebihi --target-ms.
+    """
+    env = dict(os.environ, DUMMY_MODE="0", LOG_LEVEL="WARNING", SCHEDULER_ENABLED="0", WARMUP="")
+    cmd = [sys.executable, "-X", "importtime", "-c", COLD_BOOT, args.module,
+           "1" if args.warm_up else "0", ",".join(HEAVY_MODULES)]
+    runs, process_ms, last = [], [], None
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        process_ms.append((time.perf_counter() - t0) * 1000)
+        if proc.returncode != 0:
+            print(proc.stderr[-2000:], file=sys.stderr)
+            sys.exit(2)
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        last = proc.stderr
+
+    modules = _parse_importtime(last)
+    top = sorted(modules, key=lambda m: -m[1])[:args.top]
+    import_ms = _summary_ms([r["importMs"] for r in runs])
+    report = {
+        "module": args.module,
+        "runs": args.runs,
+        "importMs": import_ms,
+        "processMs": _summary_ms(process_ms),
+        "heavyAtImport": runs[-1]["heavy"],
+        "topSelf": [{"module": m, "selfMs": round(s / 1000, 2), "cumulativeMs": round(c / 1000, 2)}
+                    for m, s, c in top],
+        "targetMs": args.target_ms,
+        "ok": args.target_ms is None or import_ms["p50"] <= args.target_ms,
+    }
+    if args.warm_up:
+        report["warmUpMs"] = _summary_ms([r["warmUpMs"] for r in runs])
+        report["warmUp"] = runs[-1]["warmUp"]
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if not report["ok"]:
+        print(f"cold start p50 {import_ms['p50']}ms > target {args.target_ms}ms", file=sys.stderr)
+        sys.exit(1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SNMP backend benchmarks")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("normalize", help="rows/sec _normalize_rows lama vs _normalize_batch")
+    p.add_argument("--rows", type=int, default=50000)
+    p.add_argument("--text-ratio", type=float, default=0.0, help="porsi nilai non-numerik")
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_normalize)
+
+    p = sub.add_parser("e2e", help="latency/throughput HTTP -> backend -> agent SNMP lokal")
+    p.add_argument("--api-url", default="http://127.0.0.1:8000")
+    p.add_argument("--flaskapi-url", default="http://127.0.0.1:5000")
+    p.add_argument("--agent-host", default="127.0.0.1")
+    p.add_argument("--agent-port", type=int, default=16100)
+    p.add_argument("--community", default="public")
+    p.add_argument("--start-agent", action="store_true", help="jalankan snmpdummy.py sebagai subprocess")
+    p.add_argument("--agent-script", default="snmpdummy.py")
+    p.add_argument("--agent-args", default="--if-rows 1000", help="argumen tambahan untuk simulator")
+    p.add_argument("--agent-startup", type=float, default=2.0, help="detik menunggu agent siap")
+    p.add_argument("--start-api", action="store_true", help="jalankan snmp_bp di app Flask minimal")
+    p.add_argument("--start-flaskapi", action="store_true")
+    p.add_argument("--flaskapi-script", default="flaskapi")
+    p.add_argument("--scenarios", default="get,walk,set,ping,flaskapi")
+    p.add_argument("--concurrency", default="1,8,32")
+    p.add_argument("--requests", type=int, default=500, help="request per scenario per level")
+    p.add_argument("--warmup", type=int, default=20)
+    p.add_argument("--timeout", type=float, default=10.0)
+    p.add_argument("--cache-ttl", type=float, default=0.0,
+                   help="TTL response cache API yang dijalankan bench (0 = mati, ukur SNMP sungguhan; "
+                        "jalankan ulang dengan nilai > 0 untuk angka cache on)")
+    p.add_argument("-o", "--output", help="simpan hasil sebagai JSON")
+    p.set_defaults(func=bench_e2e)
+
+    p = sub.add_parser("traps", help="kirim trap v2c ke TrapReceiver lokal")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=16200)
+    p.add_argument("--community", default="public")
+    p.add_argument("--count", type=int, default=10000)
+    p.add_argument("--rate", type=float, default=2000, help="trap/detik (0 = secepatnya)")
+    p.add_argument("--api-url", help="backend untuk membaca /health traps sebelum & sesudah")
+    p.add_argument("--settle", type=float, default=2.0, help="detik menunggu antrian receiver kosong")
+    p.set_defaults(func=bench_traps)
+
+    p = sub.add_parser("coldstart", help="waktu import app di proses baru + profil -X importtime")
+    p.add_argument("--module", default="app.routes_snmp")
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--top", type=int, default=15, help="jumlah modul teratas (self time) di laporan")
+    p.add_argument("--target-ms", type=float, help="gagal (exit 1) kalau p50 import di atas ini")
+    p.add_argument("--warm-up", action="store_true", help="ukur juga app.lazy.warm_up() setelah import")
+    p.add_argument("-o", "--output", help="simpan hasil sebagai JSON")
+    p.set_defaults(func=bench_coldstart)
+
+    p = sub.add_parser("compare", help="selisih dua file hasil e2e")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.set_defaults(func=bench_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# app/breaker.py
+import time
+import itertools
+import threading
+from typing import Dict, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker per target (ip, port).
+
+    - closed   : request jalan normal; `failure_threshold` kegagalan beruntun -> open
+    - open     : request langsung ditolak (negative cache) selama `open_seconds`
+    - half_open: satu request probe diizinkan; sukses -> closed, gagal -> open lagi
+                 dengan durasi dua kali lipat (maks `max_open_seconds`)
+    """
+
+    def __init__(self, failure_threshold: int = 3, open_seconds: float = 10.0,
+                 max_open_seconds: float = 300.0, probe_timeout: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.probe_timeout = probe_timeout
+        self._state: Dict[Tuple, Dict] = {}
+        self._lock = threading.Lock()
+        self._probe_ids = itertools.count(1)
+        self.rejected = 0
+
+    def _entry(self, key: Tuple) -> Dict:
+        e = self._state.get(key)
+        if e is None:
+            e = self._state[key] = {
+                "state": CLOSED, "failures": 0, "opened_at": 0.0,
+                "open_for": self.open_seconds, "probe_started": 0.0, "probe_id": 0,
+            }
+        return e
+
+    def allow(self, key: Tuple) -> Tuple[bool, float, Optional[int]]:
+        """
+        Return (boleh_lanjut, retry_after_detik, probe). `probe` = token kalau request ini
+        adalah probe half-open (serahkan ke `release()`), selain itu None.
+        """
+        with self._lock:
+            e = self._state.get(key)
+            if e is None or e["state"] == CLOSED:
+                return True, 0.0, None
+            now = time.monotonic()
+            if e["state"] == OPEN:
+                remaining = e["opened_at"] + e["open_for"] - now
+                if remaining > 0:
+                    self.rejected += 1
+                    return False, round(remaining, 2), None
+                e["state"] = HALF_OPEN
+                return True, 0.0, self._start_probe(e, now)
+            # half_open: hanya satu probe; probe yang hilang (mis. worker mati) di-reset setelah probe_timeout
+            if now - e["probe_started"] > self.probe_timeout:
+                return True, 0.0, self._start_probe(e, now)
+            self.rejected += 1
+            return False, round(e["open_for"], 2), None
+
+    def _start_probe(self, e: Dict, now: float) -> int:
+        e["probe_started"] = now
+        e["probe_id"] = next(self._probe_ids)
+        return e["probe_id"]
+
+    def release(self, key: Tuple, probe: Optional[int]):
+        """
+        Probe half-open (token dari `allow()`) selesai tanpa record_success/record_failure
+        (mis. 400, cache hit, exception sebelum query): slot probe dibebaskan sekarang daripada
+        menunggu `probe_timeout`. Tidak berpengaruh untuk request biasa (probe None), probe yang
+        sudah diganti probe baru, atau kalau hasilnya sudah dicatat.
+        """
+        if probe is None:
+            return
+        with self._lock:
+            e = self._state.get(key)
+            if e is not None and e["state"] == HALF_OPEN and e["probe_id"] == probe:
+                e["probe_started"] = float("-inf")
+
+    def failing(self, key: Tuple) -> bool:
+        """True kalau target sedang punya kegagalan beruntun / circuit tidak closed."""
+        with self._lock:
+            e = self._state.get(key)
+            return e is not None and (e["state"] != CLOSED or e["failures"] > 0)
+
+    def record_success(self, key: Tuple):
+        with self._lock:
+            e = self._state.get(key)
+            if e is not None:
+                del self._state[key]
+
+    def record_failure(self, key: Tuple):
+        with self._lock:
+            e = self._entry(key)
+            now = time.monotonic()
+            if e["state"] == HALF_OPEN:
+                e["state"] = OPEN
+                e["opened_at"] = now
+                e["open_for"] = min(self.max_open_seconds, e["open_for"] * 2)
+                return
+            e["failures"] += 1
+            if e["state"] == CLOSED and e["failures"] >= self.failure_threshold:
+                e["state"] = OPEN
+                e["opened_at"] = now
+                e["open_for"] = self.open_seconds
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            now = time.monotonic()
+            targets = {}
+            for (ip, port), e in self._state.items():
+                item = {"state": e["state"], "failures": e["failures"]}
+                if e["state"] == OPEN:
+                    item["retryAfter"] = round(max(0.0, e["opened_at"] + e["open_for"] - now), 2)
+                targets[f"{ip}:{port}"] = item
+            return {
+                "open": sum(1 for e in self._state.values() if e["state"] != CLOSED),
+                "rejected": self.rejected,
+                "targets": targets,
+            }
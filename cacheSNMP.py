@@ -0,0 +1,112 @@
+# app/cache.py
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+
+def parse_ttl_map(spec: str) -> Dict[str, float]:
+    """'1.3.6.1.2.1.1.3.0=0.5,1.3.6.1.2.1.1.1.0=60' -> {oid: ttl}"""
+    out = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            oid, ttl = part.split("=", 1)
+            try:
+                out[oid.strip()] = float(ttl)
+            except ValueError:
+                continue
+    return out
+
+
+class _Flight:
+    __slots__ = ("event", "value")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+
+
+class ResponseCache:
+    """
+    Read-through cache untuk hasil GET, key = (target, security key, OID list).
+
+    - TTL per entri = TTL terkecil dari OID di dalamnya (`ttl_by_oid`, default `default_ttl`)
+    - single-flight: N request identik yang datang bersamaan hanya memicu satu loader
+    - `invalidate(target, oid)` membuang semua entri target itu yang memuat OID tersebut (dipakai setelah SET)
+    """
+
+    def __init__(self, default_ttl: float = 1.0, ttl_by_oid: Optional[Dict[str, float]] = None,
+                 max_entries: int = 10000):
+        self.default_ttl = default_ttl
+        self.ttl_by_oid = ttl_by_oid or {}
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[float, object]]" = OrderedDict()
+        self._inflight: Dict[Tuple, _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    def ttl_for(self, oids: Iterable[str]) -> float:
+        return min((self.ttl_by_oid.get(o, self.default_ttl) for o in oids), default=self.default_ttl)
+
+    def get_or_load(self, target: Tuple, sec_key: Tuple, oids, loader: Callable[[], Tuple[object, bool]]):
+        """
+        `loader()` return (value, cacheable). Return (value, source) dengan
+        source = "hit" | "coalesced" | "miss".
+        """
+        oids = tuple(oids)
+        ttl = self.ttl_for(oids)
+        if ttl <= 0:
+            return loader()[0], "miss"
+
+        key = (tuple(target), sec_key, oids)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], "hit"
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            return flight.value, "coalesced"
+
+        value, cacheable = None, False
+        try:
+            value, cacheable = loader()
+        finally:
+            with self._lock:
+                if cacheable:
+                    self._entries[key] = (time.monotonic() + ttl, value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                del self._inflight[key]
+            flight.value = value
+            flight.event.set()
+        return value, "miss"
+
+    def invalidate(self, target: Tuple, oid: str):
+        target = tuple(target)
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == target and oid in k[2]]
+            for k in stale:
+                del self._entries[k]
+            self.invalidations += len(stale)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "coalesced": self.coalesced, "invalidations": self.invalidations,
+                "defaultTtl": self.default_ttl,
+            }
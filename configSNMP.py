@@ -1,6 +1,8 @@
 # app/config.py
 import os
 
+from .log import setup_logging, get_logger
+
 # App identity
 APP_ID_ENV   = os.getenv("APP_ID", "default-app-id")
 
@@ -10,12 +12,92 @@ SNMP_RETRIES = int(os.getenv("SNMP_RETRIES", "2"))
 SNMP_TIMEOUT = float(os.getenv("SNMP_TIMEOUT", "1"))
 MIB_DIR      = os.getenv("MIB_DIR", "./mibs")
 
+# Cache resolusi OID <-> simbol MIB
+MIB_CACHE_SIZE     = int(os.getenv("MIB_CACHE_SIZE", "65536"))
+MIB_INDEX_ON_START = os.getenv("MIB_INDEX_ON_START", "1") == "1"  # index dibangun saat resolusi pertama
+# Index terkompilasi di disk, di-mmap bersama semua worker; dibangun ulang kalau isi MIB_DIR berubah ("" = nonaktif)
+MIB_INDEX_CACHE    = os.getenv("MIB_INDEX_CACHE", "./.mibcache/mib-index.bin")
+
 # Bulk walk page size (dinamis via env)
 DEFAULT_BULK_PAGE = int(os.getenv("DEFAULT_BULK_PAGE_SIZE", "50"))
+WALK_MAX_ROWS     = int(os.getenv("WALK_MAX_ROWS", "100000"))  # batas total baris per walk (agent yang berputar)
+
+# Adaptive max-repetitions per agent (dipakai kalau client tidak kirim pageSize)
+BULK_PAGE_MIN     = int(os.getenv("BULK_PAGE_MIN", "1"))
+BULK_PAGE_MAX     = int(os.getenv("BULK_PAGE_MAX", "200"))
+BULK_TUNE_TTL     = float(os.getenv("BULK_TUNE_TTL", "3600"))
+BULK_CEILING_TTL  = float(os.getenv("BULK_CEILING_TTL", "900"))   # ceiling tooBig dilupakan
+BULK_PROBE_AFTER  = int(os.getenv("BULK_PROBE_AFTER", "20"))      # sukses beruntun -> ceiling dicoba naik
+
+# Maks varbind per GET PDU (dipecah otomatis kalau agent balas tooBig)
+MAX_VARBINDS_PER_PDU = int(os.getenv("SNMP_MAX_VARBINDS", "32"))
+
+# Cache hasil GET (detik, 0 = nonaktif); override per OID: "oid=ttl,oid=ttl"
+RESPONSE_CACHE_TTL        = float(os.getenv("SNMP_CACHE_TTL", "1"))
+RESPONSE_CACHE_TTL_BY_OID = os.getenv("SNMP_CACHE_TTL_BY_OID", "")
+RESPONSE_CACHE_MAX        = int(os.getenv("SNMP_CACHE_MAX_ENTRIES", "10000"))
+
+# Circuit breaker per agent (fail-fast ke agent yang mati)
+BREAKER_FAILURES         = int(os.getenv("BREAKER_FAILURES", "3"))
+BREAKER_OPEN_SECONDS     = float(os.getenv("BREAKER_OPEN_SECONDS", "10"))
+BREAKER_MAX_OPEN_SECONDS = float(os.getenv("BREAKER_MAX_OPEN_SECONDS", "300"))
+
+# Pool SnmpEngine (dipakai ulang antar request)
+ENGINE_POOL_SIZE     = int(os.getenv("SNMP_ENGINE_POOL_SIZE", "32"))
+ENGINE_POOL_IDLE_TTL = float(os.getenv("SNMP_ENGINE_IDLE_TTL", "300"))
+
+# Cache konteks SNMPv3 (master/localized key + engineID agent)
+USM_CACHE_SIZE    = int(os.getenv("USM_CACHE_SIZE", "1024"))
+USM_ENGINE_ID_TTL = float(os.getenv("USM_ENGINE_ID_TTL", "3600"))
+
+# Fan-out poller (banyak agent sekaligus)
+POLL_GLOBAL_LIMIT     = int(os.getenv("POLL_GLOBAL_LIMIT", "64"))
+POLL_PER_TARGET_LIMIT = int(os.getenv("POLL_PER_TARGET_LIMIT", "2"))
+POLL_TARGET_TIMEOUT   = float(os.getenv("POLL_TARGET_TIMEOUT", "5"))
+POLL_MAX_TARGETS      = int(os.getenv("POLL_MAX_TARGETS", "1000"))
+
+# Scheduler background (poll PROTOCOL_TEMPLATE tiap interval ke ring buffer)
+SCHEDULER_ENABLED   = os.getenv("SCHEDULER_ENABLED", "0") == "1"
+SCHEDULER_AGENTS    = os.getenv("SCHEDULER_AGENTS", "")  # "ip[:port],ip[:port]"
+SCHEDULER_COMMUNITY = os.getenv("SCHEDULER_COMMUNITY", "public")
+SCHEDULER_VERSION   = os.getenv("SCHEDULER_VERSION", "v2c")
+SCHEDULER_INTERVAL  = float(os.getenv("SCHEDULER_INTERVAL", "5"))
+SERIES_CAPACITY     = int(os.getenv("SERIES_CAPACITY", "17280"))  # 24 jam @ 5 detik
+
+# Counter -> rate per detik (state per target+OID)
+RATE_MAX_ENTRIES    = int(os.getenv("RATE_MAX_ENTRIES", "100000"))
+RATE_MAX_PER_SEC    = float(os.getenv("RATE_MAX_PER_SEC", "0"))  # 0 = tanpa batas; di atas ini dianggap discontinuity
+RATE_IDLE_TTL       = float(os.getenv("RATE_IDLE_TTL", "3600"))  # state target yang tidak dipoll selama ini dibuang
+
+# Trap/inform receiver (port < 1024 butuh root, default 16200)
+TRAP_ENABLED        = os.getenv("TRAP_ENABLED", "0") == "1"
+TRAP_HOST           = os.getenv("TRAP_HOST", "0.0.0.0")
+TRAP_PORT           = int(os.getenv("TRAP_PORT", "16200"))
+TRAP_COMMUNITIES    = [c.strip() for c in os.getenv("TRAP_COMMUNITIES", "public").split(",") if c.strip()]
+TRAP_V3_USERS       = os.getenv("TRAP_V3_USERS", "")  # "user:SHA:authpass:AES128:privpass[@engineIdHex],..."
+TRAP_QUEUE_MAX      = int(os.getenv("TRAP_QUEUE_MAX", "50000"))
+TRAP_FLUSH_SIZE     = int(os.getenv("TRAP_FLUSH_SIZE", "500"))
+TRAP_FLUSH_INTERVAL = float(os.getenv("TRAP_FLUSH_INTERVAL", "0.5"))
+TRAP_QUEUE_POLICY   = os.getenv("TRAP_QUEUE_POLICY", "drop_oldest")
+TRAP_RECENT         = int(os.getenv("TRAP_RECENT", "1000"))
+TRAP_TO_FIRESTORE   = os.getenv("TRAP_TO_FIRESTORE", "1") == "1"
+
+# Rollup history: jumlah bucket per resolusi
+ROLLUP_MINUTE_BUCKETS = int(os.getenv("ROLLUP_MINUTE_BUCKETS", str(7 * 24 * 60)))  # 7 hari
+ROLLUP_HOUR_BUCKETS   = int(os.getenv("ROLLUP_HOUR_BUCKETS", str(90 * 24)))        # 90 hari
+ROLLUP_MAX_POINTS     = int(os.getenv("ROLLUP_MAX_POINTS", "5000"))
 
 # Firestore key path (digunakan oleh firebase_backend.py eksternal)
 FIREBASE_KEY_PATH = os.getenv("FIREBASE_KEY_PATH", "./serviceAccountKey.json")
 
+# Antrian Firestore di background (0 = simpan sinkron seperti dulu)
+FIRESTORE_ASYNC          = os.getenv("FIRESTORE_ASYNC", "1") == "1"
+FIRESTORE_QUEUE_MAX      = int(os.getenv("FIRESTORE_QUEUE_MAX", "10000"))
+FIRESTORE_FLUSH_SIZE     = int(os.getenv("FIRESTORE_FLUSH_SIZE", "100"))
+FIRESTORE_FLUSH_INTERVAL = float(os.getenv("FIRESTORE_FLUSH_INTERVAL", "1"))
+FIRESTORE_QUEUE_POLICY   = os.getenv("FIRESTORE_QUEUE_POLICY", "drop_oldest")  # block | drop_oldest | drop_newest
+FIRESTORE_COLLECTION     = os.getenv("FIRESTORE_COLLECTION", "artifacts/{app_id}/public/data/sensor-readings-from-backend")
+
 # Security (jangan tampilkan community di prod)
 EXPOSE_COMMUNITY = os.getenv("EXPOSE_COMMUNITY_IN_META", "0") == "1"
 
@@ -30,7 +112,26 @@ CORS_ALLOWED = [
 APP_VERSION = os.getenv("APP_VERSION", "dev")
 BUILD_TIME  = os.getenv("BUILD_TIME", "")
 
-# Logging awal
-print(f"[config] APP_ID={APP_ID_ENV} | DUMMY_MODE={USE_DUMMY} | TIMEOUT={SNMP_TIMEOUT}s | RETRIES={SNMP_RETRIES}")
-print(f"[config] BULK_PAGE={DEFAULT_BULK_PAGE} | MIB_DIR={MIB_DIR}")
-print(f"[config] CORS={CORS_ALLOWED} | EXPOSE_COMMUNITY={EXPOSE_COMMUNITY}")
+# Logging terstruktur (json | text); LOG_DEBUG_SAMPLE = porsi baris DEBUG per request yang ditulis
+LOG_LEVEL        = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT       = os.getenv("LOG_FORMAT", "json")
+LOG_DEBUG_SAMPLE = float(os.getenv("LOG_DEBUG_SAMPLE", "1"))
+LOG_QUEUE_MAX    = int(os.getenv("LOG_QUEUE_MAX", "10000"))
+
+setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_DEBUG_SAMPLE, LOG_QUEUE_MAX)
+
+# Warm-up komponen lazy (pysnmp, MIB, Firestore) saat start: "" = tidak, "all", atau "mib,firestore,pysnmp"
+WARMUP            = [w.strip() for w in os.getenv("WARMUP", "").split(",") if w.strip()]
+WARMUP_BACKGROUND = os.getenv("WARMUP_BACKGROUND", "1") == "1"  # 0 = blok sampai selesai sebelum serve
+
+
+def log_config():
+    """Ringkasan config ke log. Tidak dipanggil saat import supaya import config tetap murah."""
+    get_logger("config").info(
+        "config loaded",
+        extra={
+            "appId": APP_ID_ENV, "dummy": USE_DUMMY, "timeout": SNMP_TIMEOUT, "retries": SNMP_RETRIES,
+            "bulkPage": DEFAULT_BULK_PAGE, "mibDir": MIB_DIR, "cors": CORS_ALLOWED,
+            "exposeCommunity": EXPOSE_COMMUNITY,
+        },
+    )
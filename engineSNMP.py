@@ -0,0 +1,149 @@
+# app/engine.py
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from .lazy import LazyModule
+
+hlapi = LazyModule("pysnmp.hlapi")
+
+
+def _fingerprint(*parts) -> str:
+    """Hash pendek untuk secret (community/key) supaya tidak tersimpan mentah di key pool."""
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(str(p or "").encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()[:16]
+
+
+def security_key(version: str, community: str, v3: dict) -> Tuple:
+    vs = (version or "v2c").lower()
+    if vs in ("v1", "v2c"):
+        return (vs, _fingerprint(community))
+    v3 = v3 or {}
+    return (
+        vs,
+        v3.get("user", ""),
+        (v3.get("authProto") or "NONE").upper(),
+        (v3.get("privProto") or "NONE").upper(),
+        _fingerprint(v3.get("authKey"), v3.get("privKey")),
+    )
+
+
+class EnginePool:
+    """
+    Pool SnmpEngine + UdpTransportTarget yang dipakai ulang antar request.
+
+    Key = (security params, (ip, port)). Engine di-lease secara eksklusif
+    (sync hlapi tidak thread-safe), lalu dikembalikan ke pool setelah dipakai.
+    Entri idle lebih lama dari `idle_ttl` dibuang; total engine idle dibatasi `max_size`.
+    `on_build(engine)` dipanggil untuk tiap engine baru (mis. memasang observer).
+    """
+
+    def __init__(self, max_size: int = 32, idle_ttl: float = 300.0,
+                 retries: int = 2, timeout: float = 1.0,
+                 on_build: Optional[Callable] = None):
+        self.max_size = max_size
+        self.on_build = on_build
+        self.idle_ttl = idle_ttl
+        self.retries = retries
+        self.timeout = timeout
+        self._idle: "OrderedDict[Tuple, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._idle_count = 0
+        self._in_use = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _evict_locked(self, now: float):
+        # buang entri idle yang kadaluarsa
+        for key in list(self._idle.keys()):
+            bucket = self._idle[key]
+            fresh = [e for e in bucket if now - e[2] <= self.idle_ttl]
+            self.evictions += len(bucket) - len(fresh)
+            self._idle_count -= len(bucket) - len(fresh)
+            if fresh:
+                self._idle[key] = fresh
+            else:
+                del self._idle[key]
+        # batasi ukuran total (LRU per key)
+        while self._idle_count > self.max_size and self._idle:
+            key, bucket = next(iter(self._idle.items()))
+            bucket.pop(0)
+            self._idle_count -= 1
+            self.evictions += 1
+            if not bucket:
+                del self._idle[key]
+
+    def _build(self, target: Tuple[str, int]):
+        engine = hlapi.SnmpEngine()
+        if self.on_build is not None:
+            self.on_build(engine)
+        transport = hlapi.UdpTransportTarget(target, retries=self.retries, timeout=self.timeout)
+        return engine, transport
+
+    @contextmanager
+    def lease(self, sec_key: Tuple, target: Tuple[str, int]):
+        """Pinjam (engine, transport) untuk satu operasi SNMP."""
+        key = (sec_key, tuple(target))
+        entry = None
+        with self._lock:
+            now = time.monotonic()
+            self._evict_locked(now)
+            bucket = self._idle.get(key)
+            if bucket:
+                entry = bucket.pop()
+                self._idle_count -= 1
+                if not bucket:
+                    del self._idle[key]
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._in_use += 1
+
+        if entry is None:
+            try:
+                engine, transport = self._build(target)
+            except Exception:
+                with self._lock:
+                    self._in_use -= 1
+                raise
+        else:
+            engine, transport = entry[0], entry[1]
+
+        ok = False
+        try:
+            yield engine, transport
+            ok = True
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                # engine yang gagal di tengah jalan tidak dikembalikan ke pool
+                if ok:
+                    self._idle.setdefault(key, []).append((engine, transport, time.monotonic()))
+                    self._idle.move_to_end(key)
+                    self._idle_count += 1
+                    self._evict_locked(time.monotonic())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / total, 4) if total else None,
+                "evictions": self.evictions,
+                "idle": self._idle_count,
+                "inUse": self._in_use,
+                "maxSize": self.max_size,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._idle.clear()
+            self._idle_count = 0
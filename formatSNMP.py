@@ -0,0 +1,107 @@
+# app/format.py
+import json
+import time
+from typing import Dict, Optional
+
+from flask import Response, jsonify
+
+from .metrics import STAGE_SECONDS, STAGE_SERIALIZE
+
+# MessagePack opsional (pip install msgpack)
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FORMAT_JSON = "json"
+FORMAT_COLUMNAR = "columnar"
+FORMAT_MSGPACK = "msgpack"
+
+MIME_COLUMNAR = "application/vnd.snmp.columnar+json"
+MIME_MSGPACK = "application/x-msgpack"
+
+# Kolom yang nilainya banyak berulang -> dictionary-encoded
+DICT_FIELDS = ("ip", "port", "ts", "source", "unit", "category", "type")
+PLAIN_FIELDS = ("oid", "name", "value")
+
+
+def negotiate_format(accept: str, requested: Optional[str] = None) -> Optional[str]:
+    """Pilih format dari body `format` atau header Accept. None = format tidak didukung."""
+    fmt = (requested or "").lower()
+    if not fmt:
+        accept = (accept or "").lower()
+        if MIME_MSGPACK in accept:
+            fmt = FORMAT_MSGPACK
+        elif MIME_COLUMNAR in accept:
+            fmt = FORMAT_COLUMNAR
+        else:
+            fmt = FORMAT_JSON
+    if fmt not in (FORMAT_JSON, FORMAT_COLUMNAR, FORMAT_MSGPACK):
+        return None
+    if fmt == FORMAT_MSGPACK and msgpack is None:
+        return None
+    return fmt
+
+
+def columnar_rows(rows) -> Dict:
+    """
+    rows (list of dict atau NormalizedBatch) -> kolom.
+    Field yang sama untuk semua row masuk `const`; field berulang lain jadi
+    `dict[field] = {"values": [...], "codes": [...]}`.
+    """
+    if isinstance(rows, list):
+        column = lambda f: [r.get(f) for r in rows]
+        const = {}
+    else:
+        column = rows.column
+        const = dict(rows.constants)
+
+    out = {"count": len(rows), "columns": {}, "const": const, "dict": {}}
+    for f in PLAIN_FIELDS:
+        out["columns"][f] = list(column(f))
+    for f in DICT_FIELDS:
+        if f in const:
+            continue
+        index: Dict = {}
+        codes = []
+        for v in column(f):
+            code = index.get(v)
+            if code is None:
+                code = index[v] = len(index)
+            codes.append(code)
+        values = list(index)
+        if len(values) <= 1:
+            out["const"][f] = values[0] if values else None
+        else:
+            out["dict"][f] = {"values": values, "codes": codes}
+    return out
+
+
+def build_response(meta: Dict, results, rows, fmt: str = FORMAT_JSON,
+                   include_results: bool = True, status: int = 200) -> Response:
+    """
+    Serialisasi respons /snmp. `rows` boleh list of dict atau NormalizedBatch
+    (format kolom tidak perlu membangun dict per row). Header X-Serialize-Ms dan X-Payload-Bytes
+    diisi untuk semua format supaya bisa dibandingkan.
+    """
+    t0 = time.perf_counter()
+    if fmt == FORMAT_JSON:
+        payload = {"meta": meta, "rows": rows if isinstance(rows, list) else rows.rows()}
+        if include_results:
+            payload["results"] = results
+        resp = jsonify(payload)
+    else:
+        payload = {"meta": meta, "format": FORMAT_COLUMNAR, "rows": columnar_rows(rows)}
+        if include_results:
+            payload["results"] = results
+        if fmt == FORMAT_MSGPACK:
+            resp = Response(msgpack.packb(payload, use_bin_type=True), mimetype=MIME_MSGPACK)
+        else:
+            resp = Response(json.dumps(payload, separators=(",", ":")), mimetype=MIME_COLUMNAR)
+    resp.status_code = status
+    elapsed = time.perf_counter() - t0
+    STAGE_SECONDS.observe(STAGE_SERIALIZE, value=elapsed)
+    resp.headers["X-Serialize-Ms"] = f"{elapsed * 1000:.3f}"
+    resp.headers["X-Payload-Bytes"] = str(resp.calculate_content_length() or 0)
+    resp.headers["Vary"] = "Accept"
+    return resp
@@ -0,0 +1,111 @@
+# app/lazy.py
+"""
+Inisialisasi lazy untuk komponen yang mahal di-import / dibangun (pysnmp, Firestore SDK,
+MibViewController, NumPy). Semua loader terdaftar di satu registry supaya bisa di-warm-up
+sekaligus dan waktu load-nya terlihat di /health.
+"""
+import time
+import importlib
+import threading
+from typing import Callable, Dict, Generic, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_registry: Dict[str, "Lazy"] = {}
+_registry_lock = threading.Lock()
+
+
+class Lazy(Generic[T]):
+    """Nilai yang dibuat sekali oleh `factory()` saat pertama kali `get()` (thread-safe)."""
+
+    _UNSET = object()
+
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self.factory = factory
+        self._value = self._UNSET
+        self._lock = threading.Lock()
+        self.load_ms: Optional[float] = None
+        with _registry_lock:
+            _registry[name] = self
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not self._UNSET
+
+    def get(self) -> T:
+        value = self._value
+        if value is self._UNSET:
+            with self._lock:
+                value = self._value
+                if value is self._UNSET:
+                    t0 = time.perf_counter()
+                    value = self._value = self.factory()
+                    self.load_ms = round((time.perf_counter() - t0) * 1000, 2)
+        return value
+
+    def peek(self) -> Optional[T]:
+        """Nilai kalau sudah dibuat, None kalau belum (tidak memicu load)."""
+        return None if self._value is self._UNSET else self._value
+
+
+def _shared(name: str, factory: Callable[[], T]) -> Lazy:
+    """Satu Lazy per nama: modul yang di-proxy di beberapa file tetap satu entry registry."""
+    with _registry_lock:
+        existing = _registry.get(name)
+    return existing if existing is not None else Lazy(name, factory)
+
+
+class LazyModule:
+    """
+    Proxy modul: `import` baru terjadi saat atribut pertama diakses. Atribut yang sudah
+    diambil disimpan di instance, jadi akses berikutnya tidak lewat __getattr__ lagi.
+    """
+
+    def __init__(self, module_name: str):
+        self.__dict__["_lazy"] = _shared(module_name, lambda: importlib.import_module(module_name))
+
+    def __getattr__(self, attr):
+        value = getattr(self._lazy.get(), attr)
+        self.__dict__[attr] = value
+        return value
+
+    def __repr__(self):
+        state = "loaded" if self._lazy.loaded else "not loaded"
+        return f"<lazy module {self._lazy.name!r} ({state})>"
+
+
+def optional_module(module_name: str) -> Lazy:
+    """Seperti `try: import x except ImportError: x = None`, tapi baru dicoba saat `get()`."""
+    def load():
+        try:
+            return importlib.import_module(module_name)
+        except ImportError:
+            return None
+    return _shared(module_name, load)
+
+
+def warm_up(names: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+    """
+    Paksa load komponen yang terdaftar (semua kalau `names` kosong). Nama boleh prefix,
+    mis. "pysnmp" untuk semua submodul pysnmp. Error per komponen dicatat, tidak dilempar.
+    """
+    with _registry_lock:
+        items = list(_registry.items())
+    wanted = [n for n in (names or []) if n]
+    out = {}
+    for name, lazy in items:
+        if wanted and "all" not in wanted and not any(name == w or name.startswith(w + ".") for w in wanted):
+            continue
+        try:
+            lazy.get()
+            out[name] = {"ok": True, "ms": lazy.load_ms}
+        except Exception as e:
+            out[name] = {"ok": False, "error": str(e)}
+    return out
+
+
+def stats() -> Dict[str, Dict]:
+    with _registry_lock:
+        items = list(_registry.items())
+    return {name: {"loaded": lazy.loaded, "ms": lazy.load_ms} for name, lazy in sorted(items)}
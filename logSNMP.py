@@ -0,0 +1,153 @@
+# app/log.py
+"""
+Logging terstruktur (satu objek JSON per baris) yang tidak memblokir request thread.
+
+Handler di thread pemanggil hanya menaruh record ke queue berukuran tetap; format + tulis ke
+stderr dikerjakan QueueListener di thread sendiri. Queue penuh -> record dibuang dan dihitung.
+Baris DEBUG yang volumenya tinggi (per request) bisa di-sampling lewat `debug_sample`.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+ROOT_LOGGER = "snmp"
+
+# requestId request yang sedang berjalan (di-set oleh _get_request_id, per thread / per task asyncio)
+request_id_var: ContextVar[Optional[str]] = ContextVar("snmp_request_id", default=None)
+
+# Atribut bawaan LogRecord; sisanya dianggap field dari `extra=`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "requestId"}
+
+_listener: Optional[QueueListener] = None
+_handler: Optional["_DroppingQueueHandler"] = None
+
+
+def bind_request_id(request_id: Optional[str]):
+    """Tandai log berikutnya di konteks ini dengan requestId (None = lepas)."""
+    request_id_var.set(request_id)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class _ContextFilter(logging.Filter):
+    """Isi record.requestId dan sampling DEBUG; jalan di thread pemanggil, sebelum masuk queue."""
+
+    def __init__(self, debug_sample: float):
+        super().__init__()
+        self.debug_sample = debug_sample
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG and self.debug_sample < 1.0 \
+                and random.random() >= self.debug_sample:
+            self.sampled_out += 1
+            return False
+        record.requestId = request_id_var.get()
+        return True
+
+
+class _DroppingQueueHandler(QueueHandler):
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render pesan + traceback sekarang (args bisa berubah setelah ini), field extra tetap utuh
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        rid = getattr(record, "requestId", None)
+        if rid:
+            out["requestId"] = rid
+        for k, v in record.__dict__.items():
+            if k not in _RESERVED:
+                out[k] = v
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Format ringkas untuk development: `[level] logger msg k=v ... (requestId)`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = " ".join(f"{k}={v}" for k, v in record.__dict__.items() if k not in _RESERVED)
+        line = f"[{record.levelname.lower()}] {record.name} {record.getMessage()}"
+        if fields:
+            line += " " + fields
+        rid = getattr(record, "requestId", None)
+        if rid:
+            line += f" (request {rid})"
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+def setup_logging(level: str = "INFO", fmt: str = "json", debug_sample: float = 1.0,
+                  queue_size: int = 10000, stream=None) -> logging.Logger:
+    """
+    Pasang QueueHandler di logger "snmp" (tidak menyentuh root logger aplikasi host).
+    Idempotent: pemanggilan berikutnya hanya memperbarui level dan sample rate.
+    """
+    global _listener, _handler
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    sample = min(1.0, max(0.0, debug_sample))
+    if _handler is not None:
+        for f in _handler.filters:
+            f.debug_sample = sample
+        return logger
+
+    q: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+    _handler = _DroppingQueueHandler(q)
+    _handler.addFilter(_ContextFilter(sample))
+
+    out = logging.StreamHandler(stream or sys.stderr)
+    out.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+    _listener = QueueListener(q, out, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)  # flush sisa queue saat proses keluar
+
+    logger.addHandler(_handler)
+    logger.propagate = False
+    return logger
+
+
+def stats() -> Dict:
+    if _handler is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "level": logging.getLevelName(logging.getLogger(ROOT_LOGGER).level),
+        "queued": _handler.queue.qsize(),
+        "dropped": _handler.dropped,
+        "sampledOut": sum(getattr(f, "sampled_out", 0) for f in _handler.filters),
+    }
@@ -0,0 +1,147 @@
+# app/metrics.py
+"""
+Metrics in-process dengan output format teks Prometheus (tanpa dependency).
+"""
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_str(names: Tuple[str, ...], values: Tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_: str, labels: Tuple[str, ...] = ()):
+        self.name, self.help, self.labels = name, help_, labels
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for lv, v in sorted(self._values.items()):
+                out.append(f"{self.name}{_labels_str(self.labels, lv)} {v}")
+        return out
+
+
+class Gauge(Counter):
+    def dec(self, *label_values, amount: float = 1.0):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labels = name, help_, labels
+        self.buckets = tuple(sorted(buckets))
+        self._data: Dict[Tuple, List] = {}  # labels -> [bucket_counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, *label_values, value: float):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            d = self._data.get(label_values)
+            if d is None:
+                d = self._data[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            if i < len(self.buckets):
+                d[0][i] += 1
+            d[1] += value
+            d[2] += 1
+
+    @contextmanager
+    def time(self, *label_values):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(*label_values, value=time.perf_counter() - t0)
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        with self._lock:
+            for lv, (counts, total, n) in sorted(self._data.items()):
+                cumulative = 0
+                for b, c in zip(self.buckets, counts):
+                    cumulative += c
+                    out.append(f"{self.name}_bucket{_labels_str(names, lv + (b,))} {cumulative}")
+                out.append(f"{self.name}_bucket{_labels_str(names, lv + ('+Inf',))} {n}")
+                out.append(f"{self.name}_sum{_labels_str(self.labels, lv)} {total}")
+                out.append(f"{self.name}_count{_labels_str(self.labels, lv)} {n}")
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Dict[str, float]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, fn: Callable[[], Dict[str, float]]):
+        """`fn()` -> {nama_metric: nilai}; dirender sebagai gauge saat scrape."""
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        for fn in self._collectors:
+            try:
+                values = fn()
+            except Exception:
+                continue
+            for name, v in values.items():
+                if v is None:
+                    continue
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {float(v)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "snmp_stage_seconds", "Durasi per tahap hot path SNMP API", ("stage",),
+))
+REQUESTS_TOTAL = registry.register(Counter(
+    "snmp_requests_total", "Request SNMP API per operasi/target/status HTTP", ("operation", "target", "status"),
+))
+ERRORS_TOTAL = registry.register(Counter(
+    "snmp_errors_total", "Error SNMP per operasi/target/jenis", ("operation", "target", "type"),
+))
+INFLIGHT = registry.register(Gauge(
+    "snmp_inflight_requests", "Request yang sedang diproses", ("endpoint",),
+))
+
+# Nama tahap untuk STAGE_SECONDS
+STAGE_RTT = "snmp_rtt"
+STAGE_MIB = "mib_resolve"
+STAGE_NORMALIZE = "normalize"
+STAGE_FIRESTORE = "firestore_save"
+STAGE_SERIALIZE = "serialize"
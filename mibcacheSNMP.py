@@ -0,0 +1,171 @@
+# app/mibcache.py
+import threading
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from .lazy import LazyModule
+from .log import get_logger
+from .mibstore import (
+    DictIndex, MibIndexFile, build_lock, mib_dir_fingerprint, open_index, write_index
+)
+
+smi_error = LazyModule("pysnmp.smi.error")
+
+log = get_logger("mib")
+
+
+def _oid_tuple(oid) -> Tuple[int, ...]:
+    if isinstance(oid, tuple):
+        return oid
+    return tuple(int(p) for p in str(oid).strip(".").split(".") if p)
+
+
+class OidResolver:
+    """
+    Cache resolusi OID <-> simbol MIB.
+
+    - `mib_view` boleh MibViewController atau callable yang membangunnya; callable baru
+      dipanggil saat benar-benar dibutuhkan (cold start tidak memuat/parse MIB).
+    - `index_path` (opsional): index hasil `build_index()` ditulis ke file dan dipetakan
+      (mmap, read-only) oleh semua worker; selama fingerprint `mib_dir` sama, worker baru
+      langsung memakai file itu tanpa memuat MIB sama sekali (lihat app/mibstore.py).
+    - `build_index()` menelusuri semua node di mibView sekali (otomatis saat resolusi pertama
+      kalau `index_on_load` dan cache disk tidak ada/basi) -> {oid_tuple: (module, symbol)}.
+    - `oid_to_name()` = longest-prefix match ke index -> "MODULE::symbol.<suffix>" (format
+      prettyPrint pysnmp), dibungkus LRU.
+    - `symbol_to_oid()` = lookup (module, symbol) ke index, fallback ke mibView, dibungkus LRU.
+    """
+
+    def __init__(self, mib_view, maxsize: int = 65536, index_on_load: bool = False,
+                 index_path: Optional[str] = None, mib_dir: Optional[str] = None):
+        self._view_loader = mib_view if callable(mib_view) else (lambda: mib_view)
+        self._mib_view = None
+        self._ready = False
+        self._load_lock = threading.RLock()
+        self.index_on_load = index_on_load
+        self.index_path = index_path or None
+        self.mib_dir = mib_dir
+        self._index = DictIndex({}, {})
+        self._lock = threading.Lock()
+        self.index_hits = 0
+        self.index_misses = 0
+        self.oid_to_name = lru_cache(maxsize=maxsize)(self._oid_to_name)
+        self.symbol_to_oid = lru_cache(maxsize=maxsize)(self._symbol_to_oid)
+
+    @property
+    def mib_view(self):
+        if self._mib_view is None:
+            with self._load_lock:
+                if self._mib_view is None:
+                    self._mib_view = self._view_loader()
+        return self._mib_view
+
+    def ensure_index(self):
+        """Siapkan index: petakan cache disk kalau masih valid, selain itu bangun (kalau `index_on_load`)."""
+        if self._ready:
+            return
+        # thread lain menunggu sampai index siap, supaya LRU tidak terisi hasil fallback
+        with self._load_lock:
+            if self._ready:
+                return
+            if self.index_path:
+                fingerprint = mib_dir_fingerprint(self.mib_dir)
+                with build_lock(self.index_path):
+                    # worker lain mungkin baru selesai menulis selagi kita menunggu lock
+                    index = open_index(self.index_path, fingerprint)
+                    if index is not None:
+                        self._set_index(index)
+                        log.info("mib index mapped", extra={"nodes": len(index), "path": self.index_path})
+                    elif self.index_on_load:
+                        log.info("mib index built", extra={"nodes": self.build_index(fingerprint)})
+            elif self.index_on_load:
+                log.info("mib index built", extra={"nodes": self.build_index()})
+            self._ready = True
+
+    def _set_index(self, index):
+        with self._lock:
+            self._index = index
+        self.oid_to_name.cache_clear()
+        self.symbol_to_oid.cache_clear()
+
+    def build_index(self, fingerprint: Optional[bytes] = None, load_all: bool = True) -> int:
+        """
+        Precompute index dari semua modul MIB yang bisa dimuat. Return jumlah node.
+        Kalau `index_path` diset, hasilnya ditulis ke disk lalu dipetakan dari sana.
+        """
+        builder = self.mib_view.mibBuilder
+        if load_all:
+            try:
+                builder.loadModules()
+            except smi_error.SmiError as e:
+                log.warning("loadModules partial", extra={"error": str(e)})
+
+        by_oid, by_symbol = {}, {}
+        try:
+            oid, label, suffix = self.mib_view.getFirstNodeName()
+            while True:
+                mod_name, sym_name, _ = self.mib_view.getNodeLocation(oid)
+                key = tuple(oid)
+                by_oid[key] = (mod_name, sym_name)
+                by_symbol.setdefault((mod_name, sym_name), key)
+                oid, label, suffix = self.mib_view.getNextNodeName(oid)
+        except smi_error.SmiError:
+            pass  # akhir tree
+
+        index = DictIndex(by_oid, by_symbol)
+        if self.index_path:
+            if fingerprint is None:
+                fingerprint = mib_dir_fingerprint(self.mib_dir)
+            try:
+                size = write_index(self.index_path, by_oid, fingerprint)
+                index = MibIndexFile(self.index_path, fingerprint)
+                log.info("mib index written", extra={"path": self.index_path, "bytes": size})
+            except (OSError, ValueError) as e:
+                log.warning("mib index cache not written, using in-memory index",
+                            extra={"path": self.index_path, "error": str(e)})
+        self._set_index(index)
+        return len(by_oid)
+
+    def _oid_to_name(self, oid_str: str) -> str:
+        if not self._ready:
+            self.ensure_index()
+        try:
+            oid = _oid_tuple(oid_str)
+        except ValueError:
+            return oid_str
+        hit = self._index.longest_prefix(oid)
+        if hit is not None:
+            self.index_hits += 1
+            mod_name, sym_name, depth = hit
+            suffix = "".join(f".{arc}" for arc in oid[depth:])
+            return f"{mod_name}::{sym_name}{suffix}"
+        self.index_misses += 1
+        return oid_str
+
+    def _symbol_to_oid(self, mod_name: str, sym_name: str) -> Optional[Tuple[int, ...]]:
+        if not self._ready:
+            self.ensure_index()
+        hit = self._index.symbol(mod_name, sym_name)
+        if hit is not None:
+            self.index_hits += 1
+            return hit
+        self.index_misses += 1
+        try:
+            oid, _, _ = self.mib_view.getNodeNameByDesc(sym_name, mod_name)
+            return tuple(oid)
+        except smi_error.SmiError:
+            return None
+
+    def stats(self) -> Dict:
+        names = self.oid_to_name.cache_info()
+        symbols = self.symbol_to_oid.cache_info()
+        return {
+            "viewLoaded": self._mib_view is not None,
+            "indexedNodes": len(self._index),
+            "indexSource": self._index.source,
+            "indexFile": self.index_path if self._index.source == "disk" else None,
+            "indexHits": self.index_hits,
+            "indexMisses": self.index_misses,
+            "oidToName": {"hits": names.hits, "misses": names.misses, "size": names.currsize},
+            "symbolToOid": {"hits": symbols.hits, "misses": symbols.misses, "size": symbols.currsize},
+        }
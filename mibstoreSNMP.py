@@ -0,0 +1,306 @@
+# app/mibstore.py
+"""
+Cache index OID <-> simbol MIB di disk, dipakai bersama semua worker lewat mmap read-only.
+
+Layout file (angka uint32; header little-endian, array sesudahnya native endian
+`array('I')` / `memoryview.cast('I')`):
+
+    header   : magic, versi format, fingerprint (sha256), ukuran tiap bagian, kedalaman maks
+    nodes    : per node (key_off, key_len, module_idx, symbol_idx)
+    keys     : key OID per node = arc uint32 big-endian disambung (prefix OID = prefix bytes)
+    oid_tab  : hash table open addressing crc32(key) -> node + 1 (0 = kosong)
+    sym_tab  : hash table crc32("module\0symbol") -> node + 1 (node pertama per simbol)
+    str_offs : offset string (n + 1)
+    strings  : blob UTF-8
+
+Lookup langsung di mmap (probe hash table, algoritma longest-prefix sama dengan index dict),
+tanpa membangun dict per proses; page cache OS dipakai bersama semua proses yang memetakan
+file yang sama.
+
+Fingerprint = versi format + `sys.byteorder` + itemsize uint32 + path MIB_DIR + (path, size,
+mtime) semua file di dalamnya + versi pysnmp. File yang fingerprint-nya beda (termasuk file dari
+mesin dengan byte order lain) dianggap basi dan dibangun ulang.
+
+Prebuild (mis. saat build image):  python -m app.mibstore
+"""
+import os
+import sys
+import mmap
+import json
+import time
+import struct
+import zlib
+import hashlib
+import importlib
+from array import array
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+# Lock antar proses opsional (POSIX); tanpa fcntl beberapa worker mungkin membangun bersamaan
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .log import get_logger
+
+log = get_logger("mibstore")
+
+MAGIC = b"SNMPMIB\x00"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sI32sIIIIII")
+
+
+def mib_dir_fingerprint(mib_dir: Optional[str]) -> bytes:
+    h = hashlib.sha256()
+    h.update(f"v{FORMAT_VERSION}\x00{sys.byteorder}\x00{array('I').itemsize}\x00".encode())
+    try:
+        h.update(str(getattr(importlib.import_module("pysnmp"), "__version__", "")).encode())
+    except ImportError:
+        pass
+    if mib_dir and os.path.isdir(mib_dir):
+        root = os.path.abspath(mib_dir)
+        h.update(root.encode("utf-8", "surrogateescape"))
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                rel = os.path.relpath(path, root)
+                h.update(f"\x00{rel}\x00{st.st_size}\x00{st.st_mtime_ns}".encode("utf-8", "surrogateescape"))
+    return h.digest()
+
+
+def _oid_key(oid: Tuple[int, ...]) -> bytes:
+    return struct.pack(f">{len(oid)}I", *oid)
+
+
+def _sym_key(mod_name: str, sym_name: str) -> bytes:
+    return f"{mod_name}\x00{sym_name}".encode("utf-8")
+
+
+def _table_size(n: int) -> int:
+    size = 8
+    while size < 2 * n:  # load factor <= 0.5: probe rata-rata ~1.5 slot
+        size *= 2
+    return size
+
+
+class MibIndexFile:
+    """Index OID <-> (module, symbol) yang dipetakan dari file; interface sama dengan DictIndex."""
+
+    source = "disk"
+
+    def __init__(self, path: str, fingerprint: Optional[bytes] = None):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, fp, n, key_bytes, oid_slots, sym_slots, n_str, depth = _HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError("not a MIB index file (or unsupported version)")
+            if fingerprint is not None and fp != fingerprint:
+                raise ValueError("stale MIB index")
+            self._mv = mv = memoryview(self._mm)
+            off = _HEADER.size
+            self._nodes = mv[off:off + 16 * n].cast("I")
+            off += 16 * n
+            self._keys = mv[off:off + key_bytes]
+            off += key_bytes
+            self._oid_tab = mv[off:off + 4 * oid_slots].cast("I")
+            off += 4 * oid_slots
+            self._sym_tab = mv[off:off + 4 * sym_slots].cast("I")
+            off += 4 * sym_slots
+            self._str_offs = mv[off:off + 4 * (n_str + 1)].cast("I")
+            off += 4 * (n_str + 1)
+            self._strings = mv[off:off + self._str_offs[n_str]]
+            if len(self._strings) != self._str_offs[n_str]:
+                raise ValueError("truncated MIB index file")
+        except Exception:
+            self._release()
+            raise
+        self.path, self.fingerprint, self.n, self.max_depth = path, fp, n, depth
+        self._oid_mask, self._sym_mask = oid_slots - 1, sym_slots - 1
+
+    def _release(self):
+        for name in ("_nodes", "_keys", "_oid_tab", "_sym_tab", "_str_offs", "_strings", "_mv"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self._mm.close()
+
+    def close(self):
+        """Lepas mmap. Hanya aman kalau tidak ada thread lain yang masih melakukan lookup."""
+        self._release()
+
+    def __len__(self):
+        return self.n
+
+    def _str(self, i: int) -> str:
+        return bytes(self._strings[self._str_offs[i]:self._str_offs[i + 1]]).decode("utf-8")
+
+    def _find(self, key: bytes) -> int:
+        nodes, keys, tab, mask = self._nodes, self._keys, self._oid_tab, self._oid_mask
+        h = zlib.crc32(key) & mask
+        while True:
+            v = tab[h]
+            if not v:
+                return -1
+            a, n = nodes[4 * v - 4], nodes[4 * v - 3]
+            if n == len(key) and keys[a:a + n] == key:
+                return v - 1
+            h = (h + 1) & mask
+
+    def oid(self, i: int) -> Tuple[int, ...]:
+        a, n = self._nodes[4 * i], self._nodes[4 * i + 1]
+        return struct.unpack(f">{n // 4}I", self._keys[a:a + n])
+
+    def location(self, i: int) -> Tuple[str, str]:
+        return self._str(self._nodes[4 * i + 2]), self._str(self._nodes[4 * i + 3])
+
+    def longest_prefix(self, oid: Tuple[int, ...]) -> Optional[Tuple[str, str, int]]:
+        """(module, symbol, jumlah arc node) untuk node terpanjang yang jadi prefix `oid`."""
+        try:
+            key = _oid_key(oid[:self.max_depth])
+        except struct.error:  # arc negatif / > 2^32-1: bukan OID SNMP yang valid
+            return None
+        for n in range(len(key), 0, -4):
+            i = self._find(key[:n])
+            if i >= 0:
+                return (*self.location(i), n // 4)
+        return None
+
+    def symbol(self, mod_name: str, sym_name: str) -> Optional[Tuple[int, ...]]:
+        tab, mask = self._sym_tab, self._sym_mask
+        h = zlib.crc32(_sym_key(mod_name, sym_name)) & mask
+        while True:
+            v = tab[h]
+            if not v:
+                return None
+            if self.location(v - 1) == (mod_name, sym_name):
+                return self.oid(v - 1)
+            h = (h + 1) & mask
+
+
+class DictIndex:
+    """Index di memori proses (dipakai kalau cache disk nonaktif / gagal ditulis)."""
+
+    source = "memory"
+
+    def __init__(self, by_oid: Dict[Tuple[int, ...], Tuple[str, str]], by_symbol: Dict[Tuple[str, str], Tuple[int, ...]]):
+        self._by_oid = by_oid
+        self._by_symbol = by_symbol
+        self.max_depth = max((len(k) for k in by_oid), default=0)
+
+    def __len__(self):
+        return len(self._by_oid)
+
+    def longest_prefix(self, oid: Tuple[int, ...]) -> Optional[Tuple[str, str, int]]:
+        by_oid = self._by_oid
+        for n in range(min(len(oid), self.max_depth), 0, -1):
+            hit = by_oid.get(oid[:n])
+            if hit is not None:
+                return (*hit, n)
+        return None
+
+    def symbol(self, mod_name: str, sym_name: str) -> Optional[Tuple[int, ...]]:
+        return self._by_symbol.get((mod_name, sym_name))
+
+
+def write_index(path: str, by_oid: Dict[Tuple[int, ...], Tuple[str, str]], fingerprint: bytes) -> int:
+    """Tulis index ke `path` secara atomik (tmp + rename). Return ukuran file (byte)."""
+    oids = sorted(by_oid)
+    strings: Dict[str, int] = {}
+
+    def intern(s: str) -> int:
+        i = strings.get(s)
+        if i is None:
+            i = strings[s] = len(strings)
+        return i
+
+    nodes, keys = array("I"), bytearray()
+    oid_tab = array("I", bytes(4 * _table_size(len(oids))))
+    sym_tab = array("I", bytes(4 * _table_size(len(oids))))
+    oid_mask, sym_mask = len(oid_tab) - 1, len(sym_tab) - 1
+    seen_symbols = set()
+    for i, oid in enumerate(oids):
+        mod_name, sym_name = by_oid[oid]
+        key = _oid_key(oid)
+        nodes.extend((len(keys), len(key), intern(mod_name), intern(sym_name)))
+        keys += key
+        h = zlib.crc32(key) & oid_mask
+        while oid_tab[h]:
+            h = (h + 1) & oid_mask
+        oid_tab[h] = i + 1
+        # sama dengan setdefault di build_index: OID terkecil untuk tiap (module, symbol)
+        if (mod_name, sym_name) not in seen_symbols:
+            seen_symbols.add((mod_name, sym_name))
+            h = zlib.crc32(_sym_key(mod_name, sym_name)) & sym_mask
+            while sym_tab[h]:
+                h = (h + 1) & sym_mask
+            sym_tab[h] = i + 1
+
+    blob = bytearray()
+    str_offs = array("I", [0])
+    for s in strings:  # dict mempertahankan urutan intern
+        blob += s.encode("utf-8")
+        str_offs.append(len(blob))
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, fingerprint, len(oids), len(keys), len(oid_tab),
+                          len(sym_tab), len(strings), max((len(o) for o in oids), default=0))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        for part in (header, nodes.tobytes(), keys, oid_tab.tobytes(), sym_tab.tobytes(),
+                     str_offs.tobytes(), blob):
+            f.write(part)
+    # rename atomik: worker yang sedang memetakan file lama tetap memegang inode lama
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def open_index(path: str, fingerprint: bytes) -> Optional[MibIndexFile]:
+    """MibIndexFile kalau file ada dan fingerprint cocok; None kalau tidak ada / basi / rusak."""
+    try:
+        return MibIndexFile(path, fingerprint)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, struct.error) as e:
+        log.info("mib index cache not usable", extra={"path": path, "reason": str(e)})
+        return None
+
+
+@contextmanager
+def build_lock(path: str):
+    """Lock eksklusif antar proses selama membangun index (worker lain menunggu lalu memakai hasilnya)."""
+    f = None
+    if fcntl is not None:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            f = open(path + ".lock", "a")
+        except OSError:
+            f = None  # filesystem read-only (mis. image serverless dengan index prebuilt): tanpa lock
+    if f is None:
+        yield
+        return
+    with f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def main():
+    """Bangun ulang cache index dari MIB_DIR sekarang (untuk dijalankan saat build/deploy)."""
+    from .helpers import oid_resolver
+
+    t0 = time.time()
+    nodes = oid_resolver.build_index()
+    print(json.dumps({"nodes": nodes, "seconds": round(time.time() - t0, 2), **oid_resolver.stats()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
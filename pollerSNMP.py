@@ -0,0 +1,108 @@
+# app/poller.py
+import time
+import asyncio
+from typing import Dict, List, AsyncIterator
+
+from .helpers import (
+    _security, _parse_object_identity, _validate_v3, _normalize_rows,
+    _make_meta, _varbind_to_result, usm_cache
+)
+from .lazy import LazyModule
+
+aio = LazyModule("pysnmp.hlapi.asyncio")
+
+
+class FanOutPoller:
+    """
+    Poll banyak agent sekaligus via pysnmp asyncio.
+
+    - `global_limit`  : maks request in-flight total
+    - `per_target_limit`: maks request in-flight per (ip, port)
+    - `target_timeout`: batas waktu per target (detik), termasuk retry
+
+    Hasil di-yield per target begitu selesai, jadi durasi satu siklus
+    mengikuti agent paling lambat, bukan jumlah semua agent.
+    """
+
+    def __init__(self, global_limit: int = 64, per_target_limit: int = 2,
+                 target_timeout: float = 5.0, retries: int = 1, timeout: float = 1.0):
+        self.global_limit = max(1, global_limit)
+        self.per_target_limit = max(1, per_target_limit)
+        self.target_timeout = target_timeout
+        self.retries = retries
+        self.timeout = timeout
+
+    async def _poll_one(self, engine, global_sem, target_sems, spec: Dict, oids: List[str]) -> Dict:
+        ip = spec.get("ip")
+        port = int(spec.get("port", 161))
+        version = (spec.get("version") or "v2c").lower()
+        community = spec.get("community", "public")
+        v3_cfg = spec.get("v3") or {}
+
+        meta = _make_meta(ip, "get", oids, version, community, port)
+        if not ip:
+            return {"meta": meta, "error": {"code": 400, "message": "Missing 'ip'"}}
+        if version == "v3":
+            ok, msg = _validate_v3(v3_cfg)
+            if not ok:
+                return {"meta": meta, "error": {"code": 400, "message": msg}}
+
+        sem = target_sems.setdefault((ip, port), asyncio.Semaphore(self.per_target_limit))
+        t0 = time.time()
+        try:
+            async with global_sem, sem:
+                errorIndication, errorStatus, errorIndex, varBinds = await asyncio.wait_for(
+                    aio.getCmd(
+                        engine, _security(version, community, v3_cfg, (ip, port)),
+                        aio.UdpTransportTarget((ip, port), retries=self.retries, timeout=self.timeout),
+                        aio.ContextData(), *[_parse_object_identity(o) for o in oids]
+                    ),
+                    timeout=self.target_timeout,
+                )
+        except asyncio.TimeoutError:
+            return {"meta": meta, "error": {"code": 504, "message": "Target timed out"}}
+        except Exception as e:
+            return {"meta": meta, "error": {"code": 500, "message": str(e)}}
+
+        meta["latency_ms"] = int((time.time() - t0) * 1000)
+        if errorIndication:
+            return {"meta": meta, "error": {"code": 500, "message": f"SNMP errorIndication: {errorIndication}"}}
+        if errorStatus:
+            return {"meta": meta, "error": {"code": 500, "message": f"SNMP errorStatus: {errorStatus.prettyPrint()}"}}
+
+        results = [_varbind_to_result(o, v) for o, v in varBinds]
+        return {"meta": meta, "results": results, "rows": _normalize_rows(results, ip, port)}
+
+    async def poll(self, targets: List[Dict], oids: List[str]) -> AsyncIterator[Dict]:
+        """Async generator: yield hasil per target sesuai urutan selesai."""
+        engine = usm_cache.watch(aio.SnmpEngine())
+        global_sem = asyncio.Semaphore(self.global_limit)
+        target_sems: Dict = {}
+        tasks = [
+            asyncio.ensure_future(self._poll_one(engine, global_sem, target_sems, spec, oids))
+            for spec in targets
+        ]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                yield await fut
+        finally:
+            for t in tasks:
+                t.cancel()
+            # transportDispatcher baru dibuat saat request pertama; None kalau semua target gagal lebih dulu
+            if engine.transportDispatcher is not None:
+                engine.transportDispatcher.closeDispatcher()
+
+
+def iter_poll(poller: FanOutPoller, targets: List[Dict], oids: List[str]):
+    """Jembatan sync untuk Flask: jalankan poll di event loop sendiri, yield hasil satu per satu."""
+    loop = asyncio.new_event_loop()
+    agen = poller.poll(targets, oids)
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(agen.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(agen.aclose())
+        loop.close()
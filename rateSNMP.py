@@ -0,0 +1,182 @@
+# app/rate.py
+import math
+import threading
+from array import array
+from typing import Dict, Iterable, Optional, Tuple
+
+COUNTER_BITS = {"Counter32": 32, "Counter64": 64}
+SYS_UPTIME_OID = "1.3.6.1.2.1.1.3.0"
+
+
+class RateEngine:
+    """
+    Ubah sampel Counter32/Counter64 berurutan jadi rate per detik, key = (target, OID).
+
+    State per key disimpan di array paralel (nilai terakhir, timestamp, sysUpTime, rate terakhir),
+    index slot dari dict; tidak ada objek per counter.
+
+    - nilai turun + sysUpTime agent turun  -> agent restart: sampel jadi baseline baru (rate None)
+    - nilai turun, Counter32, sysUpTime naik -> wrap 2^32
+    - nilai turun, sysUpTime tidak diketahui -> baseline baru (wrap dan restart tidak bisa dibedakan)
+    - nilai turun, Counter64               -> dianggap reset (wrap 64-bit praktis tidak terjadi)
+    - rate > `max_rate` (kalau diset)      -> dianggap discontinuity, dibuang
+
+    Target yang tidak diupdate lebih dari `idle_ttl` detik dibuang oleh `sweep()` (jalan tiap
+    `idle_ttl` dari `rates_for`, dan saat tabel penuh), lalu array di-`compact()`.
+    """
+
+    def __init__(self, max_entries: int = 100000, max_rate: Optional[float] = None,
+                 idle_ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.max_rate = max_rate
+        self.idle_ttl = idle_ttl
+        self._slots: Dict[Tuple[str, str], int] = {}
+        self._value = array("Q")
+        self._ts = array("d")
+        self._uptime = array("d")   # detik; -1 = tidak diketahui
+        self._rate = array("d")     # rate terakhir; NaN = belum ada
+        self._lock = threading.RLock()  # sweep() memanggil forget()/compact() sambil memegang lock
+        self._last_sweep = float("-inf")
+        self.wraps = 0
+        self.resets = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def update(self, target: str, oid: str, value: int, ts: float, bits: int = 32,
+               uptime: Optional[float] = None) -> Optional[float]:
+        """Masukkan satu sampel; return rate/detik, atau None untuk sampel pertama / setelah reset."""
+        value = int(value) & ((1 << bits) - 1)
+        up = -1.0 if uptime is None else float(uptime)
+        key = (target, oid)
+        with self._lock:
+            i = self._slots.get(key)
+            if i is None:
+                if len(self._slots) >= self.max_entries:
+                    # tabel penuh: coba buang target idle dulu (paling sering sekali per detik)
+                    if ts - self._last_sweep < 1.0 or not self.sweep(ts):
+                        self.rejected += 1
+                        return None
+                self._slots[key] = len(self._value)
+                self._value.append(value)
+                self._ts.append(ts)
+                self._uptime.append(up)
+                self._rate.append(math.nan)
+                return None
+
+            prev, prev_ts, prev_up = self._value[i], self._ts[i], self._uptime[i]
+            self._value[i], self._ts[i], self._uptime[i] = value, ts, up
+            self._rate[i] = math.nan
+
+            dt = ts - prev_ts
+            known_up = prev_up >= 0 and up >= 0
+            if known_up:
+                if up < prev_up:
+                    self.resets += 1
+                    return None
+                # selisih sysUpTime lebih tepat dari jam poller (tidak kena jitter jaringan)
+                if up > prev_up:
+                    dt = up - prev_up
+            if dt <= 0:
+                return None
+
+            delta = value - prev
+            if delta < 0:
+                if bits == 64 or not known_up:
+                    self.resets += 1
+                    return None
+                delta += 1 << bits
+                self.wraps += 1
+            rate = delta / dt
+            if self.max_rate is not None and rate > self.max_rate:
+                self.resets += 1
+                return None
+            self._rate[i] = rate
+            return rate
+
+    def rates_for(self, target: str, results: Iterable[Dict], ts: float) -> Dict[str, Optional[float]]:
+        """
+        Rate untuk semua Counter32/Counter64 di hasil get/walk (format _varbind_to_result).
+        sysUpTime.0 di hasil yang sama dipakai untuk deteksi restart.
+        """
+        results = list(results)
+        if ts - self._last_sweep >= self.idle_ttl:
+            self.sweep(ts)
+        uptime = None
+        for r in results:
+            if r.get("oid") == SYS_UPTIME_OID:
+                try:
+                    uptime = int(r["value"]) / 100.0  # TimeTicks = 1/100 detik
+                except (TypeError, ValueError):
+                    pass
+                break
+        out = {}
+        for r in results:
+            bits = COUNTER_BITS.get(r.get("type"))
+            if bits is None:
+                continue
+            try:
+                value = int(r["value"])
+            except (TypeError, ValueError):
+                continue
+            rate = self.update(target, r["oid"], value, ts, bits, uptime)
+            out[r["oid"]] = None if rate is None else round(rate, 3)
+        return out
+
+    def latest(self, target: str) -> Dict[str, Dict]:
+        """Rate terakhir per OID untuk satu target: {oid: {"rate", "ts"}} (rate None = belum ada)."""
+        with self._lock:
+            out = {}
+            for (t, oid), i in self._slots.items():
+                if t == target:
+                    rate = self._rate[i]
+                    out[oid] = {"rate": None if math.isnan(rate) else round(rate, 3), "ts": self._ts[i]}
+            return out
+
+    def forget(self, target: str):
+        """Buang state satu target. Slot lama tidak dipakai ulang sampai `compact()`."""
+        with self._lock:
+            for key in [k for k in self._slots if k[0] == target]:
+                del self._slots[key]
+
+    def compact(self):
+        """Susun ulang array supaya slot yang sudah di-forget tidak memakan memori."""
+        with self._lock:
+            value, ts, up, rate = array("Q"), array("d"), array("d"), array("d")
+            for key, i in self._slots.items():
+                self._slots[key] = len(value)
+                value.append(self._value[i])
+                ts.append(self._ts[i])
+                up.append(self._uptime[i])
+                rate.append(self._rate[i])
+            self._value, self._ts, self._uptime, self._rate = value, ts, up, rate
+
+    def sweep(self, now: float) -> int:
+        """Forget target yang sampel terakhirnya lebih tua dari `idle_ttl`; return jumlah key dibuang."""
+        with self._lock:
+            self._last_sweep = now
+            last_seen: Dict[str, float] = {}
+            for (t, _), i in self._slots.items():
+                last_seen[t] = max(last_seen.get(t, self._ts[i]), self._ts[i])
+            before = len(self._slots)
+            for t, seen in last_seen.items():
+                if now - seen > self.idle_ttl:
+                    self.forget(t)
+            removed = before - len(self._slots)
+            if removed:
+                self.evicted += removed
+                self.compact()
+            return removed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._slots),
+                "slots": len(self._value),
+                "maxEntries": self.max_entries,
+                "wraps": self.wraps,
+                "resets": self.resets,
+                "rejected": self.rejected,
+                "evicted": self.evicted,
+                "bytes": (self._value.itemsize + self._ts.itemsize + self._uptime.itemsize
+                          + self._rate.itemsize) * len(self._value),
+            }
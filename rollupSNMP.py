@@ -0,0 +1,196 @@
+# app/rollup.py
+import math
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .series import SeriesStore
+from .lazy import optional_module
+
+# NumPy opsional: dipakai untuk agregasi range ad-hoc kalau tersedia (di-import saat query pertama)
+_numpy = optional_module("numpy")
+
+RAW = 0
+
+
+class _BucketRing:
+    """Ring bucket agregat (start, min, max, sum, count) untuk satu resolusi."""
+
+    __slots__ = ("resolution", "capacity", "start", "min", "max", "sum", "count", "_head", "_size")
+
+    def __init__(self, resolution: int, capacity: int):
+        self.resolution = resolution
+        self.capacity = max(1, capacity)
+        zeros = bytes(8 * self.capacity)
+        self.start = array("d", zeros)
+        self.min = array("d", zeros)
+        self.max = array("d", zeros)
+        self.sum = array("d", zeros)
+        self.count = array("d", zeros)
+        self._head = 0
+        self._size = 0
+
+    def _index_of(self, pos: int) -> int:
+        """pos 0 = bucket terlama."""
+        oldest = (self._head - self._size) % self.capacity
+        return (oldest + pos) % self.capacity
+
+    def _merge(self, i: int, value: float):
+        if value < self.min[i]:
+            self.min[i] = value
+        if value > self.max[i]:
+            self.max[i] = value
+        self.sum[i] += value
+        self.count[i] += 1
+
+    def add(self, ts: float, value: float) -> bool:
+        """Return False kalau sampel terlalu lama (bucket sudah keluar dari ring)."""
+        b = math.floor(ts / self.resolution) * self.resolution
+        if self._size:
+            last = (self._head - 1) % self.capacity
+            if b == self.start[last]:
+                self._merge(last, value)
+                return True
+            if b < self.start[last]:
+                starts = self.ordered()[0]
+                pos = bisect_left(starts, b)
+                if pos < len(starts) and starts[pos] == b:
+                    self._merge(self._index_of(pos), value)
+                    return True
+                return False
+        i = self._head
+        self.start[i] = b
+        self.min[i] = value
+        self.max[i] = value
+        self.sum[i] = value
+        self.count[i] = 1
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+        return True
+
+    def ordered(self) -> Tuple[array, ...]:
+        cols = (self.start, self.min, self.max, self.sum, self.count)
+        if self._size < self.capacity:
+            return tuple(c[:self._size] for c in cols)
+        h = self._head
+        return tuple(c[h:] + c[:h] for c in cols)
+
+    def range(self, start: float, end: float) -> Tuple[array, ...]:
+        cols = self.ordered()
+        lo = bisect_left(cols[0], start)
+        hi = bisect_left(cols[0], end)
+        return tuple(c[lo:hi] for c in cols)
+
+
+def _aggregate(ts, mins, maxs, sums, counts, start: float, step: float) -> Dict[str, List]:
+    """Gabung bucket/sampel ke bin berukuran `step` (vectorized kalau NumPy ada)."""
+    if not len(ts):
+        return {"ts": [], "min": [], "max": [], "avg": [], "count": []}
+
+    np = _numpy.get()
+    if np is not None:
+        ts_a = np.frombuffer(ts, dtype=np.float64) if isinstance(ts, array) else np.asarray(ts, dtype=np.float64)
+        as_np = lambda c: np.frombuffer(c, dtype=np.float64) if isinstance(c, array) else np.asarray(c, dtype=np.float64)
+        bins = np.floor((ts_a - start) / step).astype(np.int64)
+        uniq, inv = np.unique(bins, return_inverse=True)
+        n = len(uniq)
+        s = np.bincount(inv, weights=as_np(sums), minlength=n)
+        c = np.bincount(inv, weights=as_np(counts), minlength=n)
+        mn = np.full(n, np.inf)
+        mx = np.full(n, -np.inf)
+        np.minimum.at(mn, inv, as_np(mins))
+        np.maximum.at(mx, inv, as_np(maxs))
+        return {
+            "ts": (start + uniq * step).tolist(),
+            "min": mn.tolist(), "max": mx.tolist(),
+            "avg": (s / np.maximum(c, 1)).tolist(), "count": c.astype(np.int64).tolist(),
+        }
+
+    out: Dict[int, List[float]] = {}
+    for t, lo, hi, sm, ct in zip(ts, mins, maxs, sums, counts):
+        k = int(math.floor((t - start) / step))
+        agg = out.get(k)
+        if agg is None:
+            out[k] = [lo, hi, sm, ct]
+        else:
+            agg[0] = min(agg[0], lo)
+            agg[1] = max(agg[1], hi)
+            agg[2] += sm
+            agg[3] += ct
+    keys = sorted(out)
+    return {
+        "ts": [start + k * step for k in keys],
+        "min": [out[k][0] for k in keys], "max": [out[k][1] for k in keys],
+        "avg": [out[k][2] / out[k][3] for k in keys], "count": [int(out[k][3]) for k in keys],
+    }
+
+
+class RollupStore:
+    """
+    Agregat min/max/avg/count per (target, metric) di beberapa resolusi,
+    di-update incremental tiap sampel masuk.
+
+    `resolutions` = {detik_per_bucket: jumlah_bucket}. Resolusi RAW (0) dibaca dari
+    `raw_store` (SeriesStore) kalau diberikan.
+    """
+
+    def __init__(self, resolutions: Optional[Dict[int, int]] = None, raw_store: Optional[SeriesStore] = None):
+        self.resolutions = dict(sorted((resolutions or {60: 7 * 24 * 60, 3600: 90 * 24}).items()))
+        self.raw_store = raw_store
+        self._rings: Dict[Tuple[str, str], Dict[int, _BucketRing]] = {}
+        self._lock = threading.Lock()
+        self.late_dropped = 0
+
+    def _add_locked(self, target: str, metric: str, ts: float, value: float):
+        rings = self._rings.get((target, metric))
+        if rings is None:
+            rings = self._rings[(target, metric)] = {
+                res: _BucketRing(res, cap) for res, cap in self.resolutions.items()
+            }
+        for ring in rings.values():
+            if not ring.add(ts, value):
+                self.late_dropped += 1
+
+    def add(self, target: str, metric: str, ts: float, value: float):
+        with self._lock:
+            self._add_locked(target, metric, ts, value)
+
+    def add_rows(self, target: str, ts: float, rows: Iterable[Tuple[str, float]]):
+        """Masukkan semua sampel (metric, value) satu target dengan timestamp sama, satu kali lock."""
+        with self._lock:
+            for metric, value in rows:
+                self._add_locked(target, metric, ts, value)
+
+    def pick_resolution(self, step: float) -> int:
+        """Resolusi paling kasar yang masih <= step (RAW kalau step < resolusi terkecil)."""
+        chosen = RAW
+        for res in self.resolutions:
+            if res <= step:
+                chosen = res
+        return chosen
+
+    def query(self, target: str, metric: str, start: float, end: float, step: float) -> Optional[Dict]:
+        step = max(1.0, float(step))
+        res = self.pick_resolution(step)
+
+        if res == RAW:
+            if self.raw_store is None:
+                res = next(iter(self.resolutions))
+            else:
+                data = self.raw_store.window(target, metric, since=start)
+                if data is None:
+                    return None
+                hi = bisect_left(data["ts"], end)
+                ts, values = data["ts"][:hi], data["values"][:hi]
+                out = _aggregate(ts, values, values, values, [1.0] * len(ts), start, step)
+                return {"resolution": "raw", "step": step, **out}
+
+        with self._lock:
+            rings = self._rings.get((target, metric))
+            if rings is None:
+                return None
+            cols = rings[res].range(start, end)
+        out = _aggregate(*cols, start=start, step=step)
+        return {"resolution": res, "step": step, **out}
@@ -0,0 +1,287 @@
+# app/routes_snmp_async.py
+"""
+Varian async (ASGI) dari snmp_bp: kontrak /health, /version, /ping-agent, /snmp sama persis,
+tapi I/O SNMP lewat transport asyncio pysnmp, jadi agent lambat hanya memakan coroutine.
+
+Kerja yang memblok (load pysnmp/MIB/Firestore, lokalisasi key USM, simpan Firestore
+sinkron) tidak dijalankan di event loop: di-warm-up sebelum serve lewat executor, dan
+per request dipindah ke `run_in_executor`.
+
+Jalankan dengan Quart + server ASGI, mis.:
+    hypercorn "app.routes_snmp_async:create_app()"
+"""
+import time
+import uuid
+import asyncio
+import weakref
+import functools
+from quart import Quart, Blueprint, request, jsonify
+
+
+from .config import (
+    APP_ID_ENV, USE_DUMMY, DEFAULT_BULK_PAGE, SNMP_RETRIES, SNMP_TIMEOUT,
+    APP_VERSION, BUILD_TIME, MAX_VARBINDS_PER_PDU, WALK_MAX_ROWS
+)
+from .helpers import (
+    _security, _parse_object_identity, _normalize_batch, _make_meta, _save_to_firestore,
+    _varbind_to_result, _parse_snmp_body, _dummy_results, usm_cache, firestore, mib_index
+)
+from .log import bind_request_id, get_logger
+from .lazy import LazyModule, warm_up
+
+# pysnmp asyncio baru di-import saat request SNMP pertama
+aio = LazyModule("pysnmp.hlapi.asyncio")
+rfc1905 = LazyModule("pysnmp.proto.rfc1905")
+
+snmp_async_bp = Blueprint("snmp_async_bp", __name__)
+
+log = get_logger("routes_async")
+
+SNMP_ERR_TOO_BIG = 1
+
+# Komponen yang di-load sebelum serve (lihat create_app)
+STARTUP_WARMUP = ["pysnmp", "mib", "firestore"]
+
+# Satu SnmpEngine asyncio per event loop (dispatcher-nya terikat ke loop tempat dibuat);
+# dibuat saat request pertama di loop itu, ikut dibuang kalau loop-nya hilang
+_engines: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+def _get_engine():
+    loop = asyncio.get_running_loop()
+    engine = _engines.get(loop)
+    if engine is None:
+        engine = _engines[loop] = usm_cache.watch(aio.SnmpEngine())
+    return engine
+
+async def _blocking(fn, *args):
+    """Jalankan `fn(*args)` di thread pool default supaya event loop tidak tertahan."""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(fn, *args))
+
+async def _security_async(version, community, v3, target):
+    # v3: derivasi/lokalisasi key (hash ribuan ronde) saat cache USM miss -> executor
+    if (version or "v2c").lower() in ("v1", "v2c"):
+        return _security(version, community, v3, target)
+    return await _blocking(_security, version, community, v3, target)
+
+async def _parse_objects(oid_strs):
+    """OID numerik diparse langsung; nama simbolik bisa memuat MIB -> executor."""
+    if any(c.isalpha() for o in oid_strs for c in o):
+        return await _blocking(lambda: [_parse_object_identity(o) for o in oid_strs])
+    return [_parse_object_identity(o) for o in oid_strs]
+
+async def _to_results(varbinds):
+    """Konversi varbind; kalau index MIB belum siap, build/load-nya terjadi di executor."""
+    if not mib_index.loaded:
+        return await _blocking(lambda: [_varbind_to_result(o, v) for o, v in varbinds])
+    return [_varbind_to_result(o, v) for o, v in varbinds]
+
+async def _save(meta, results, rows):
+    loaded = firestore.peek()
+    # sudah dimuat dan (nonaktif atau lewat antrian background) -> submit() tidak memblok
+    if loaded is not None and (loaded[0] is None or loaded[1] is not None):
+        return _save_to_firestore(meta, results, rows)
+    return await _blocking(_save_to_firestore, meta, results, rows)
+
+# _get_request_id/_error versi Quart (helpers.py memakai request/jsonify Flask)
+def _get_request_id() -> str:
+    rid = request.headers.get("X-Request-Id") or str(uuid.uuid4())
+    bind_request_id(rid)  # ContextVar: terisolasi per task asyncio
+    return rid
+
+def _error(code: int, message: str, request_id: str, details: dict | None = None):
+    payload = {"error": {"code": code, "message": message}}
+    if details:
+        payload["error"]["details"] = details
+    payload["requestId"] = request_id
+    return jsonify(payload), code
+
+def _target(ip, port):
+    return aio.UdpTransportTarget((ip, port), retries=SNMP_RETRIES, timeout=SNMP_TIMEOUT)
+
+async def _get_batched(sec, target, objs, chunk=MAX_VARBINDS_PER_PDU):
+    """Sama dengan versi sync: GET banyak OID per PDU, pecah dua kalau tooBig."""
+    chunk = max(1, chunk)
+    pending = [objs[i:i + chunk] for i in range(0, len(objs), chunk)]
+    results = []
+    while pending:
+        batch = pending.pop(0)
+        errorIndication, errorStatus, errorIndex, varBinds = await aio.getCmd(
+            _get_engine(), sec, target, aio.ContextData(), *batch
+        )
+        if errorIndication:
+            return None, f"SNMP errorIndication: {errorIndication}"
+        if errorStatus:
+            if int(errorStatus) == SNMP_ERR_TOO_BIG and len(batch) > 1:
+                mid = len(batch) // 2
+                pending[:0] = [batch[:mid], batch[mid:]]
+                continue
+            return None, f"SNMP errorStatus: {errorStatus.prettyPrint()}"
+        results.extend(varBinds)
+    return await _to_results(results), None
+
+async def _walk(sec, target, target_obj, page_size):
+    """GETBULK berulang sampai keluar dari subtree awal (setara lexicographicMode=False)."""
+    results, err = await _walk_varbinds(sec, target, target_obj, page_size)
+    return await _to_results(results), err
+
+async def _walk_varbinds(sec, target, target_obj, page_size, max_rows=WALK_MAX_ROWS):
+    """
+    Walk manual dengan bulkCmd asyncio. Seperti walk sync pysnmp: berhenti dengan error kalau
+    agent mengembalikan OID yang tidak naik (kalau tidak, loop tak berujung) dan berhenti
+    setelah `max_rows` baris.
+    """
+    results = []
+    prefix = None
+    current = target_obj
+    while True:
+        errorIndication, errorStatus, errorIndex, varBindTable = await aio.bulkCmd(
+            _get_engine(), sec, target, aio.ContextData(), 0, page_size, current
+        )
+        if errorIndication:
+            return results, f"SNMP errorIndication: {errorIndication}"
+        if errorStatus:
+            return results, f"SNMP errorStatus: {errorStatus.prettyPrint()}"
+        if prefix is None:
+            prefix = current[0].getOid()
+
+        start = last = current[0].getOid()
+        for row in varBindTable:
+            for oid_result, val_result in row:
+                if isinstance(val_result, rfc1905.EndOfMibView) or not prefix.isPrefixOf(oid_result):
+                    return results, None
+                if oid_result <= last:
+                    return results, "SNMP errorIndication: OID not increasing"
+                results.append((oid_result, val_result))
+                if len(results) >= max_rows:
+                    return results, None
+                last = oid_result
+        if last == start:
+            return results, None
+        current = aio.ObjectType(aio.ObjectIdentity(last))
+
+# ---- Health & Version ----
+@snmp_async_bp.get("/health")
+async def health():
+    return {"ok": True, "dummy": USE_DUMMY, "appId": APP_ID_ENV, "async": True}, 200
+
+@snmp_async_bp.get("/version")
+async def version():
+    return {"version": APP_VERSION, "buildTime": BUILD_TIME}, 200
+
+# ---- RTT ping-agent ----
+@snmp_async_bp.get("/ping-agent")
+async def ping_agent():
+    request_id = _get_request_id()
+    ip = request.args.get("ip")
+    community = request.args.get("community", "public")
+    version = request.args.get("version", "v2c")
+    oid = request.args.get("oid", "1.3.6.1.2.1.1.3.0")  # sysUpTime
+    try:
+        port = int(request.args.get("port", 161))
+    except ValueError:
+        return _error(400, "Invalid 'port' parameter", request_id)
+
+    if not ip:
+        return _error(400, "Missing 'ip' parameter", request_id)
+
+    try:
+        sec = await _security_async(version, community, {}, (ip, port))
+        target_obj, = await _parse_objects([oid])
+        start = time.time()
+        errorIndication, errorStatus, errorIndex, varBinds = await aio.getCmd(
+            _get_engine(), sec, _target(ip, port), aio.ContextData(), target_obj
+        )
+        if errorIndication:
+            return _error(500, f"SNMP errorIndication: {errorIndication}", request_id)
+        if errorStatus:
+            return _error(500, f"SNMP errorStatus: {errorStatus.prettyPrint()}", request_id)
+        latency = round((time.time() - start) * 1000, 2)
+        return {"ip": ip, "oid": oid, "latency_ms": latency, "status": "ok", "requestId": request_id}, 200
+    except Exception as e:
+        return _error(500, str(e), request_id)
+
+# ---- Main SNMP endpoint ----
+@snmp_async_bp.post("/snmp")
+async def handle_snmp_request():
+    request_id = _get_request_id()
+    t0 = time.time()
+
+    if not request.is_json:
+        return _error(415, "Content-Type must be application/json", request_id)
+    data = await request.get_json() or {}
+    params, err = _parse_snmp_body(data)
+    if err:
+        return _error(err[0], err[1], request_id)
+
+    operation, ip, oid, oids, get_oids = (
+        params["operation"], params["ip"], params["oid"], params["oids"], params["get_oids"]
+    )
+    port, version = params["port"], params["version"]
+    page_size = max(1, min(200, params["page_size"] or DEFAULT_BULK_PAGE))
+    include_results = data.get("includeResults", True) is not False
+
+    meta = _make_meta(ip, operation, oids if oids else oid, version, params["community"], port)
+    if operation == "walk":
+        meta["pageSize"] = page_size
+
+    if USE_DUMMY:
+        results, err = _dummy_results(operation, oid, get_oids, params["setValue"])
+        if err:
+            return _error(err[0], err[1], request_id)
+    else:
+        try:
+            sec = await _security_async(version, params["community"], params["v3"], (ip, port))
+            target = _target(ip, port)
+            objs = await _parse_objects([oid] + (get_oids[1:] if operation == "get" else []))
+            target_obj = objs[0]
+            results = []
+
+            if operation == "get":
+                results, err = await _get_batched(sec, target, objs)
+            elif operation == "walk":
+                results, err = await _walk(sec, target, target_obj, page_size)
+            else:
+                if operation == "set":
+                    if not params["setValue"]:
+                        return _error(400, "SET requires 'setValue'", request_id)
+                    val_to_set = aio.OctetString(str(params["setValue"]).encode("utf-8"))
+                    errorIndication, errorStatus, errorIndex, varBinds = await aio.setCmd(
+                        _get_engine(), sec, target, aio.ContextData(), aio.ObjectType(aio.ObjectIdentity(oid), val_to_set)
+                    )
+                else:
+                    errorIndication, errorStatus, errorIndex, varBindTable = await aio.nextCmd(
+                        _get_engine(), sec, target, aio.ContextData(), target_obj
+                    )
+                    varBinds = varBindTable[0] if varBindTable else []
+                err = None
+                if errorIndication:
+                    err = f"SNMP errorIndication: {errorIndication}"
+                elif errorStatus:
+                    err = f"SNMP errorStatus: {errorStatus.prettyPrint()}"
+                else:
+                    results = await _to_results(varBinds)
+            if err:
+                return _error(500, err, request_id)
+        except Exception as e:
+            return _error(500, str(e), request_id)
+
+    rows = _normalize_batch(results, ip, port).rows()
+    meta["latency_ms"] = int((time.time() - t0) * 1000)
+    meta["requestId"] = request_id
+    await _save(meta, results, rows)
+    payload = {"meta": meta, "rows": rows}
+    if include_results:
+        payload["results"] = results
+    return jsonify(payload), 200
+
+def create_app() -> Quart:
+    app = Quart(__name__)
+    app.register_blueprint(snmp_async_bp)
+
+    @app.before_serving
+    async def _warm_up():
+        # import pysnmp, index MIB, SDK Firestore: dimuat di executor sebelum request pertama
+        loaded = await _blocking(warm_up, STARTUP_WARMUP)
+        log.info("warm-up done", extra={"loaded": loaded})
+
+    return app
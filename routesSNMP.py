@@ -1,33 +1,373 @@
 # app/routes_snmp.py
 import time
+import json
 import random
-from flask import Blueprint, request, jsonify
+import threading
+from flask import Blueprint, request, Response, stream_with_context, g
 
-from pysnmp.hlapi import (
-    SnmpEngine, UdpTransportTarget, ContextData,
-    ObjectType, ObjectIdentity, getCmd, nextCmd, setCmd, bulkCmd, OctetString
-)
 
 from .config import (
     APP_ID_ENV, USE_DUMMY, DEFAULT_BULK_PAGE, SNMP_RETRIES, SNMP_TIMEOUT,
-    APP_VERSION, BUILD_TIME
+    APP_VERSION, BUILD_TIME, ENGINE_POOL_SIZE, ENGINE_POOL_IDLE_TTL,
+    MAX_VARBINDS_PER_PDU, POLL_GLOBAL_LIMIT, POLL_PER_TARGET_LIMIT,
+    POLL_TARGET_TIMEOUT, POLL_MAX_TARGETS, BULK_PAGE_MIN, BULK_PAGE_MAX,
+    BULK_TUNE_TTL, BULK_CEILING_TTL, BULK_PROBE_AFTER,
+    RESPONSE_CACHE_TTL, RESPONSE_CACHE_TTL_BY_OID, RESPONSE_CACHE_MAX,
+    SCHEDULER_ENABLED, SCHEDULER_AGENTS, SCHEDULER_COMMUNITY, SCHEDULER_VERSION,
+    SCHEDULER_INTERVAL, SERIES_CAPACITY, ROLLUP_MINUTE_BUCKETS, ROLLUP_HOUR_BUCKETS,
+    ROLLUP_MAX_POINTS, BREAKER_FAILURES, BREAKER_OPEN_SECONDS, BREAKER_MAX_OPEN_SECONDS,
+    TRAP_ENABLED, TRAP_HOST, TRAP_PORT, TRAP_COMMUNITIES, TRAP_V3_USERS, TRAP_QUEUE_MAX,
+    TRAP_FLUSH_SIZE, TRAP_FLUSH_INTERVAL, TRAP_QUEUE_POLICY, TRAP_RECENT, TRAP_TO_FIRESTORE,
+    RATE_MAX_ENTRIES, RATE_MAX_PER_SEC, RATE_IDLE_TTL, WARMUP, WARMUP_BACKGROUND, WALK_MAX_ROWS,
+    log_config
 )
 from .helpers import (
-    _get_request_id, _error, _validate_v3, _security, _parse_object_identity,
-    _normalize_rows, _make_meta, _save_to_firestore
+    _get_request_id, _error, _security, _parse_object_identity,
+    _normalize_rows, _normalize_batch, _make_meta, _save_to_firestore, _varbind_to_result,
+    PROTOCOL_TEMPLATE, DUMMY_RANGES, oid_resolver, firestore_queue_stats, _parse_snmp_body,
+    _dummy_results, usm_cache
+)
+from .engine import EnginePool, security_key
+from .poller import FanOutPoller, iter_poll
+from .tuning import BulkTuner
+from .cache import ResponseCache, parse_ttl_map
+from .breaker import CircuitBreaker
+from .metrics import (
+    registry, STAGE_SECONDS, REQUESTS_TOTAL, ERRORS_TOTAL, INFLIGHT,
+    STAGE_RTT, STAGE_MIB, STAGE_NORMALIZE
 )
+from .series import SeriesStore
+from .rollup import RollupStore
+from .format import negotiate_format, build_response
+from .scheduler import PollScheduler, parse_agents
+from .traps import TrapReceiver, parse_v3_users
+from .rate import RateEngine, SYS_UPTIME_OID
+from .log import get_logger, bind_request_id, stats as log_stats
+from .lazy import LazyModule, warm_up, stats as lazy_stats
+
+# pysnmp baru di-import saat request SNMP pertama (cold start tanpa hlapi)
+hlapi = LazyModule("pysnmp.hlapi")
+errind = LazyModule("pysnmp.proto.errind")
 
 snmp_bp = Blueprint("snmp_bp", __name__)
+log = get_logger("routes")
+
+# Satu pool per proses, dipakai bersama oleh semua worker thread Flask
+engine_pool = EnginePool(
+    max_size=ENGINE_POOL_SIZE, idle_ttl=ENGINE_POOL_IDLE_TTL,
+    retries=SNMP_RETRIES, timeout=SNMP_TIMEOUT, on_build=usm_cache.watch,
+)
+
+fanout_poller = FanOutPoller(
+    global_limit=POLL_GLOBAL_LIMIT, per_target_limit=POLL_PER_TARGET_LIMIT,
+    target_timeout=POLL_TARGET_TIMEOUT, retries=SNMP_RETRIES, timeout=SNMP_TIMEOUT,
+)
+
+bulk_tuner = BulkTuner(
+    initial=DEFAULT_BULK_PAGE, min_reps=BULK_PAGE_MIN, max_reps=BULK_PAGE_MAX,
+    ttl=BULK_TUNE_TTL, probe_after=BULK_PROBE_AFTER, ceiling_ttl=BULK_CEILING_TTL,
+)
+
+response_cache = ResponseCache(
+    default_ttl=RESPONSE_CACHE_TTL, ttl_by_oid=parse_ttl_map(RESPONSE_CACHE_TTL_BY_OID),
+    max_entries=RESPONSE_CACHE_MAX,
+)
+
+breaker = CircuitBreaker(
+    failure_threshold=BREAKER_FAILURES, open_seconds=BREAKER_OPEN_SECONDS,
+    max_open_seconds=BREAKER_MAX_OPEN_SECONDS,
+)
+
+series_store = SeriesStore(capacity=SERIES_CAPACITY)
+rollup_store = RollupStore(
+    {60: ROLLUP_MINUTE_BUCKETS, 3600: ROLLUP_HOUR_BUCKETS}, raw_store=series_store,
+)
+rate_engine = RateEngine(max_entries=RATE_MAX_ENTRIES, max_rate=RATE_MAX_PER_SEC or None,
+                         idle_ttl=RATE_IDLE_TTL)
+
+SNMP_ERR_TOO_BIG = 1
+ERR_INDICATION = "SNMP errorIndication"
+ERR_STATUS = "SNMP errorStatus"
+
+def _get_batched(engine, sec, target, objs, chunk=MAX_VARBINDS_PER_PDU):
+    """
+    GET banyak OID dengan PDU sesedikit mungkin.
+    Batch yang dibalas tooBig dipecah dua lalu dikirim ulang (urutan hasil tetap).
+    Return (varbinds mentah, error_message); konversi lewat _to_results di luar timer RTT.
+    """
+    chunk = max(1, chunk)
+    pending = [objs[i:i + chunk] for i in range(0, len(objs), chunk)]
+    results = []
+    while pending:
+        batch = pending.pop(0)
+        errorIndication, errorStatus, errorIndex, varBinds = next(
+            hlapi.getCmd(engine, sec, target, hlapi.ContextData(), *batch)
+        )
+        if errorIndication:
+            return None, f"SNMP errorIndication: {errorIndication}"
+        if errorStatus:
+            if int(errorStatus) == SNMP_ERR_TOO_BIG and len(batch) > 1:
+                mid = len(batch) // 2
+                pending[:0] = [batch[:mid], batch[mid:]]
+                continue
+            return None, f"SNMP errorStatus: {errorStatus.prettyPrint()}"
+        results.extend(varBinds)
+    return results, None
+
+def _to_results(varbinds):
+    """(oid, value) mentah -> format _varbind_to_result; resolusi nama dicatat sebagai tahap MIB."""
+    with STAGE_SECONDS.time(STAGE_MIB):
+        return [_varbind_to_result(o, v) for o, v in varbinds]
+
+def _should_shrink(errorIndication, errorStatus):
+    """
+    Alasan mengecilkan max-repetitions: "tooBig" (pasti ukuran PDU), "timeout" (mungkin
+    ukuran PDU, mungkin agent mati), atau None.
+    """
+    if errorIndication is not None:
+        return "timeout" if isinstance(errorIndication, errind.RequestTimedOut) else None
+    if errorStatus is not None and int(errorStatus) == SNMP_ERR_TOO_BIG:
+        return "tooBig"
+    return None
+
+def _tune_failure(ip, port, page_size, reason) -> bool:
+    """
+    Laporkan kegagalan walk ke bulk_tuner. Hanya tooBig yang menurunkan ceiling; timeout ke
+    agent yang sudah gagal beruntun (breaker) diabaikan karena bukan soal ukuran halaman.
+    Return True kalau halaman dikecilkan.
+    """
+    if not reason or (reason == "timeout" and breaker.failing((ip, port))):
+        return False
+    bulk_tuner.failure((ip, port), page_size, too_big=(reason == "tooBig"))
+    return True
+
+def _walk_collect(engine, sec, target, target_obj, page_size):
+    """Return (varbinds mentah, error_message, shrink_reason)."""
+    results = []
+    iterator = hlapi.bulkCmd(engine, sec, target, hlapi.ContextData(), 0, page_size, target_obj,
+                             lexicographicMode=False, maxRows=WALK_MAX_ROWS)
+    for errorIndication, errorStatus, errorIndex, varBinds in iterator:
+        if errorIndication:
+            return results, f"SNMP errorIndication: {errorIndication}", _should_shrink(errorIndication, None)
+        if errorStatus:
+            return results, f"SNMP errorStatus: {errorStatus.prettyPrint()}", _should_shrink(None, errorStatus)
+        results.extend(varBinds)
+    return results, None, None
+
+def _dummy_poll(targets, oids):
+    for spec in targets:
+        ip, port = spec.get("ip"), int(spec.get("port", 161))
+        version = (spec.get("version") or "v2c").lower()
+        results = []
+        for o in oids:
+            tpl = PROTOCOL_TEMPLATE.get(o, {})
+            lo, hi = DUMMY_RANGES.get(o, (0.0, 100.0))
+            results.append({"oid": o, "name": tpl.get("name", o),
+                            "value": f"{random.uniform(lo, hi):.2f}", "type": "Float", "dummy": True})
+        meta = _make_meta(ip, "get", oids, version, spec.get("community", "public"), port)
+        meta["latency_ms"] = 0
+        yield {"meta": meta, "results": results, "rows": _normalize_rows(results, ip, port)}
+
+def _poll_targets(targets, oids):
+    """Poll banyak target; yield {"meta", "results", "rows"} atau {"meta", "error"} per target."""
+    if USE_DUMMY:
+        return _dummy_poll(targets, oids)
+    return iter_poll(fanout_poller, targets, oids)
+
+def _record_snmp_failure(target, message: str) -> str:
+    """
+    Catat satu kegagalan query SNMP (breaker, cache USM, metrik, log); return jenisnya.
+    errorIndication (timeout/transport) = kegagalan breaker; errorStatus berarti agent
+    masih menjawab, jadi dihitung sukses.
+    """
+    if message.startswith(ERR_INDICATION):
+        breaker.record_failure(target)
+        usm_cache.forget(target)  # engineID bisa berubah (agent diganti/reset) -> discovery ulang
+        kind = "indication"
+    elif message.startswith(ERR_STATUS):
+        breaker.record_success(target)
+        kind = "status"
+    else:
+        kind = "exception"
+    ERRORS_TOTAL.inc(g.get("snmp_operation", "ping"), f"{target[0]}:{target[1]}", kind)
+    log.warning("snmp failed", extra={"target": f"{target[0]}:{target[1]}", "kind": kind, "error": message})
+    return kind
+
+def _snmp_fail(target, message: str, request_id: str):
+    """_error(500) untuk jalur SNMP, setelah kegagalannya dicatat."""
+    _record_snmp_failure(target, message)
+    return _error(500, message, request_id)
+
+def _circuit_open(ip, port, retry_after, request_id):
+    return _error(503, "Agent unreachable (circuit open)", request_id,
+                  {"ip": ip, "port": port, "retryAfter": retry_after})
+
+def _ndjson(obj) -> str:
+    return json.dumps(obj) + "\n"
+
+def _stream_walk(sec, sec_key, ip, port, target_obj, page_size, meta, request_id, t0, adaptive=False,
+                 probe=None):
+    """
+    Walk dengan output NDJSON: baris pertama {"meta"}, lalu satu baris per row,
+    dikirim per halaman GETBULK, ditutup {"done", "count", "latency_ms"}.
+    Memori dibatasi ukuran halaman (hasil tidak dikumpulkan seluruhnya).
+    """
+    try:
+        yield from _stream_walk_pages(sec, sec_key, ip, port, target_obj, page_size, meta,
+                                      request_id, t0, adaptive)
+    finally:
+        # probe half-open yang berakhir tanpa hasil (exception / client putus) dilepas
+        breaker.release((ip, port), probe)
+
+def _stream_walk_pages(sec, sec_key, ip, port, target_obj, page_size, meta, request_id, t0, adaptive):
+    yield _ndjson({"meta": meta, "requestId": request_id})
+    count = 0
+    page = []
+    try:
+        with engine_pool.lease(sec_key, (ip, port)) as (engine, target):
+            iterator = hlapi.bulkCmd(engine, sec, target, hlapi.ContextData(), 0, page_size, target_obj,
+                                     lexicographicMode=False, maxRows=WALK_MAX_ROWS)
+            for errorIndication, errorStatus, errorIndex, varBinds in iterator:
+                if errorIndication or errorStatus:
+                    msg = (f"SNMP errorIndication: {errorIndication}" if errorIndication
+                           else f"SNMP errorStatus: {errorStatus.prettyPrint()}")
+                    if adaptive:
+                        _tune_failure(ip, port, page_size, _should_shrink(errorIndication, errorStatus))
+                    _record_snmp_failure((ip, port), msg)
+                    if page:
+                        yield "".join(page)
+                    yield _ndjson({"error": {"code": 500, "message": msg}, "requestId": request_id})
+                    return
+                results = _to_results(varBinds)
+                page.extend(_ndjson({"row": r}) for r in _normalize_rows(results, ip, port))
+                count += len(results)
+                if len(page) >= page_size:
+                    yield "".join(page)
+                    page = []
+    except Exception as e:
+        if page:
+            yield "".join(page)
+        yield _ndjson({"error": {"code": 500, "message": str(e)}, "requestId": request_id})
+        return
+    if page:
+        yield "".join(page)
+    if adaptive:
+        bulk_tuner.success((ip, port), page_size)
+    breaker.record_success((ip, port))
+    yield _ndjson({"done": True, "count": count, "latency_ms": int((time.time() - t0) * 1000)})
+
+def _wants_stream(data: dict) -> bool:
+    return bool(data.get("stream")) or "application/x-ndjson" in (request.headers.get("Accept") or "")
+
+# ---- Scheduler background ----
+poll_scheduler = PollScheduler(
+    series_store,
+    parse_agents(SCHEDULER_AGENTS, SCHEDULER_COMMUNITY, SCHEDULER_VERSION),
+    list(PROTOCOL_TEMPLATE.keys()),
+    _poll_targets,
+    interval=SCHEDULER_INTERVAL,
+    rollup=rollup_store,
+    metric_names={oid: tpl["name"] for oid, tpl in PROTOCOL_TEMPLATE.items() if tpl.get("name")},
+)
+if SCHEDULER_ENABLED:
+    poll_scheduler.start()
+
+# ---- Trap/inform receiver ----
+trap_receiver = TrapReceiver(
+    host=TRAP_HOST, port=TRAP_PORT, communities=TRAP_COMMUNITIES,
+    v3_users=parse_v3_users(TRAP_V3_USERS),
+    forward=(lambda ev: _save_to_firestore(ev["meta"], ev["results"], ev["rows"])) if TRAP_TO_FIRESTORE else None,
+    max_queue=TRAP_QUEUE_MAX, flush_size=TRAP_FLUSH_SIZE, flush_interval=TRAP_FLUSH_INTERVAL,
+    policy=TRAP_QUEUE_POLICY, recent=TRAP_RECENT,
+)
+if TRAP_ENABLED:
+    trap_receiver.start()
+
+# ---- Warm-up opsional saat start (default: semua lazy sampai dipakai) ----
+def _warm_up_on_start():
+    loaded = warm_up(WARMUP)
+    log.info("warm-up done", extra={"loaded": loaded})
+    log_config()
+
+if WARMUP:
+    if WARMUP_BACKGROUND:
+        threading.Thread(target=_warm_up_on_start, name="snmp-warmup", daemon=True).start()
+    else:
+        _warm_up_on_start()
+
+# ---- Metrics ----
+registry.register_collector(lambda: {
+    "snmp_engine_pool_hits": engine_pool.hits,
+    "snmp_engine_pool_misses": engine_pool.misses,
+    "snmp_response_cache_hits": response_cache.hits,
+    "snmp_response_cache_misses": response_cache.misses,
+    "snmp_breakers_open": breaker.snapshot()["open"],
+    "snmp_firestore_queue_depth": (firestore_queue_stats() or {}).get("queued"),
+    "snmp_traps_received": trap_receiver.received,
+    "snmp_traps_delivered": trap_receiver.delivered,
+    "snmp_traps_dropped": trap_receiver.writer.dropped if trap_receiver.writer else None,
+})
+
+@snmp_bp.before_request
+def _track_inflight():
+    g.inflight_endpoint = request.endpoint or "unknown"
+    INFLIGHT.inc(g.inflight_endpoint)
+
+@snmp_bp.after_request
+def _count_request(response):
+    if "snmp_operation" in g:
+        REQUESTS_TOTAL.inc(g.snmp_operation, g.snmp_target, response.status_code)
+    return response
+
+@snmp_bp.teardown_request
+def _untrack_inflight(exc):
+    if "inflight_endpoint" in g:
+        INFLIGHT.dec(g.inflight_endpoint)
+    bind_request_id(None)  # thread worker dipakai ulang; jangan bawa requestId ke request lain
+
+@snmp_bp.get("/metrics")
+def metrics():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
 
 # ---- Health & Version ----
 @snmp_bp.get("/health")
 def health():
-    return {"ok": True, "dummy": USE_DUMMY, "appId": APP_ID_ENV}, 200
+    return {
+        "ok": True, "dummy": USE_DUMMY, "appId": APP_ID_ENV,
+        "enginePool": engine_pool.stats(),
+        "oidCache": oid_resolver.stats(),
+        "usmCache": usm_cache.stats(),
+        "responseCache": response_cache.stats(),
+        "scheduler": poll_scheduler.stats(),
+        "traps": trap_receiver.stats(),
+        "rates": rate_engine.stats(),
+        "breakers": breaker.snapshot(),
+        "firestoreQueue": firestore_queue_stats(),
+        "logging": log_stats(),
+        "lazy": lazy_stats(),
+    }, 200
+
+@snmp_bp.get("/warmup")
+def warmup():
+    """
+    Hook warm-up: load komponen lazy sekarang (mis. dipanggil load balancer / platform
+    sebelum instance menerima traffic). `?only=mib,firestore,pysnmp` untuk sebagian saja.
+    """
+    only = [p.strip() for p in request.args.get("only", "").split(",") if p.strip()]
+    t0 = time.time()
+    loaded = warm_up(only)
+    return {"ok": all(v["ok"] for v in loaded.values()), "loaded": loaded,
+            "ms": int((time.time() - t0) * 1000)}, 200
 
 @snmp_bp.get("/version")
 def version():
     return {"version": APP_VERSION, "buildTime": BUILD_TIME}, 200
 
+@snmp_bp.get("/snmp/bulk-tuning")
+def bulk_tuning():
+    """Nilai max-repetitions yang sedang dipelajari per agent."""
+    return {"default": DEFAULT_BULK_PAGE, "targets": bulk_tuner.snapshot()}, 200
+
 # ---- RTT ping-agent ----
 @snmp_bp.get("/ping-agent")
 def ping_agent():
@@ -36,27 +376,41 @@ def ping_agent():
     community = request.args.get("community", "public")
     version = request.args.get("version", "v2c")
     oid = request.args.get("oid", "1.3.6.1.2.1.1.3.0")  # sysUpTime
+    try:
+        port = int(request.args.get("port", 161))
+    except ValueError:
+        return _error(400, "Invalid 'port' parameter", request_id)
 
     if not ip:
         return _error(400, "Missing 'ip' parameter", request_id)
 
+    g.snmp_operation, g.snmp_target = "ping", f"{ip}:{port}"
+    allowed, retry_after, probe = breaker.allow((ip, port))
+    if not allowed:
+        return _circuit_open(ip, port, retry_after, request_id)
+
     try:
-        sec = _security(version, community, {})
-        target = UdpTransportTarget((ip, 161), retries=SNMP_RETRIES, timeout=SNMP_TIMEOUT)
-        target_obj = _parse_object_identity(oid)
+        sec = _security(version, community, {}, (ip, port))
+        with STAGE_SECONDS.time(STAGE_MIB):
+            target_obj = _parse_object_identity(oid)
 
         start = time.time()
-        iterator = getCmd(SnmpEngine(), sec, target, ContextData(), target_obj)
-        for errorIndication, errorStatus, errorIndex, varBinds in iterator:
-            if errorIndication:
-                return _error(500, f"SNMP errorIndication: {errorIndication}", request_id)
-            if errorStatus:
-                return _error(500, f"SNMP errorStatus: {errorStatus.prettyPrint()}", request_id)
-            break
+        with engine_pool.lease(security_key(version, community, {}), (ip, port)) as (engine, target), \
+                STAGE_SECONDS.time(STAGE_RTT):
+            iterator = hlapi.getCmd(engine, sec, target, hlapi.ContextData(), target_obj)
+            for errorIndication, errorStatus, errorIndex, varBinds in iterator:
+                if errorIndication:
+                    return _snmp_fail((ip, port), f"SNMP errorIndication: {errorIndication}", request_id)
+                if errorStatus:
+                    return _snmp_fail((ip, port), f"SNMP errorStatus: {errorStatus.prettyPrint()}", request_id)
+                break
+        breaker.record_success((ip, port))
         latency = round((time.time() - start) * 1000, 2)
         return {"ip": ip, "oid": oid, "latency_ms": latency, "status": "ok", "requestId": request_id}, 200
     except Exception as e:
         return _error(500, str(e), request_id)
+    finally:
+        breaker.release((ip, port), probe)
 
 # ---- Main SNMP endpoint ----
 @snmp_bp.post("/snmp")
@@ -69,118 +423,288 @@ def handle_snmp_request():
             return _error(415, "Content-Type must be application/json", request_id)
 
         data = request.get_json() or {}
-        operation = (data.get("operation") or "").lower()
-        ip        = data.get("ip")
-        oid       = data.get("oid", "")
-        setValue  = data.get("setValue")
-        port      = int(data.get("port", 161))
-        version   = (data.get("version") or "v2c").lower()
-        community = data.get("community", "public")
-        v3_cfg    = data.get("v3") or {}
-        page_size = int(data.get("pageSize", DEFAULT_BULK_PAGE))
-
-        if page_size < 1:
-            page_size = 1
-        elif page_size > 200:
-            page_size = 200
-
-        if not oid or not str(oid).strip():
-            return _error(400, "Missing or empty 'oid'", request_id)
-        if operation not in ("get", "getnext", "walk", "set"):
-            return _error(400, "Invalid operation", request_id)
-        if version == "v3":
-            ok, msg = _validate_v3(v3_cfg)
-            if not ok:
-                return _error(400, msg, request_id)
-        elif not all([operation, ip, oid, community]):
-            return _error(400, "Missing required parameters", request_id)
+        params, err = _parse_snmp_body(data)
+        if err:
+            return _error(err[0], err[1], request_id)
+        operation, ip, oid, oids, get_oids = (
+            params["operation"], params["ip"], params["oid"], params["oids"], params["get_oids"]
+        )
+        setValue, port, version = params["setValue"], params["port"], params["version"]
+        community, v3_cfg = params["community"], params["v3"]
+
+        # pageSize eksplisit = dipakai apa adanya; kalau tidak, pakai nilai hasil tuning per agent
+        adaptive  = params["page_size"] is None
+        page_size = bulk_tuner.get((ip, port)) if adaptive else params["page_size"]
+        page_size = max(1, min(200, page_size))
+
+        stream = operation == "walk" and _wants_stream(data)
+        # Format respons: json (default), columnar, msgpack; results bisa di-skip
+        fmt = negotiate_format(request.headers.get("Accept"), data.get("format"))
+        if fmt is None:
+            return _error(406, "Unsupported response format", request_id)
+        include_results = data.get("includeResults", True) is not False
+        want_rates = bool(data.get("rates")) and operation in ("get", "walk")
 
     except Exception as e:
         return _error(400, f"Bad request: {e}", request_id)
 
-    meta = _make_meta(ip, operation, oid, version, community, port)
-    print(f"[request {request_id}] {operation.upper()} ip={ip} oid={oid} ver={version} pageSize={page_size} dummy={USE_DUMMY}")
+    meta = _make_meta(ip, operation, oids if oids else oid, version, community, port)
+    if operation == "walk":
+        meta["pageSize"] = page_size
+        meta["adaptivePageSize"] = adaptive
+    g.snmp_operation, g.snmp_target = operation, f"{ip}:{port}"
+    log.debug("snmp request", extra={
+        "operation": operation, "ip": ip, "oid": oid, "version": version,
+        "pageSize": page_size, "dummy": USE_DUMMY,
+    })
 
     # ---------- DUMMY MODE ----------
     if USE_DUMMY:
-        results = []
-        rf = lambda a, b: f"{random.uniform(a, b):.2f}"
-
-        if oid.startswith("1.3.6.1.4.1.9999.1.2") or ("9999.1.2" in oid):
-            if operation == "walk":
-                results = [
-                    {"oid": "1.3.6.1.4.1.9999.1.2.0", "name": "temperature", "value": rf(20.0, 30.0),  "type": "Float"},
-                    {"oid": "1.3.6.1.4.1.9999.1.2.1", "name": "humidity",    "value": rf(40.0, 70.0),  "type": "Float"},
-                    {"oid": "1.3.6.1.4.1.9999.1.2.2", "name": "voltage",     "value": rf(700.0, 800.0),"type": "Float"},
-                    {"oid": "1.3.6.1.4.1.9999.1.2.3", "name": "current",     "value": rf(0.5, 2.0),    "type": "Float"},
-                ]
-            elif operation == "get":
-                results = [{"oid": oid, "name": "temperature", "value": rf(20.0, 30.0), "type": "Float"}]
-            elif operation == "getnext":
-                results = [{"oid": oid, "name": "humidity", "value": rf(40.0, 70.0), "type": "Float"}]
-            elif operation == "set":
-                if not setValue:
-                    return _error(400, "SET requires 'setValue'", request_id)
-                results = [{"oid": oid, "name": "dummySet", "value": f"Value set to: {setValue}", "type": "OctetString"}]
-        else:
-            return _error(404, "Dummy Agent does not recognize this OID", request_id)
-
-        for r in results:
-            r["dummy"] = True
+        results, err = _dummy_results(operation, oid, get_oids, setValue)
+        if err:
+            return _error(err[0], err[1], request_id)
 
-        rows = _normalize_rows(results, ip, port)
+        with STAGE_SECONDS.time(STAGE_NORMALIZE):
+            rows = _normalize_batch(results, ip, port)
+        if stream:
+            lines = [_ndjson({"meta": meta, "requestId": request_id})]
+            lines += [_ndjson({"row": r}) for r in rows.rows()]
+            lines.append(_ndjson({"done": True, "count": len(rows), "latency_ms": int((time.time() - t0) * 1000)}))
+            return Response(lines, mimetype="application/x-ndjson")
         latency_ms = int((time.time() - t0) * 1000)
         meta["latency_ms"] = latency_ms
         meta["requestId"]  = request_id
         _save_to_firestore(meta, results, rows)
-        return jsonify({"meta": meta, "results": results, "rows": rows}), 200
+        return build_response(meta, results, rows, fmt, include_results)
 
     # ---------- REAL SNMP ----------
+    if operation == "set" and not setValue:
+        return _error(400, "SET requires 'setValue'", request_id)
+
+    allowed, retry_after, probe = breaker.allow((ip, port))
+    if not allowed:
+        return _circuit_open(ip, port, retry_after, request_id)
+
+    streaming = False
     try:
-        sec = _security(version, community, v3_cfg)
-        target = UdpTransportTarget((ip, port), retries=SNMP_RETRIES, timeout=SNMP_TIMEOUT)
-        target_obj = _parse_object_identity(oid)
+        sec = _security(version, community, v3_cfg, (ip, port))
+        with STAGE_SECONDS.time(STAGE_MIB):
+            target_obj = _parse_object_identity(oid)
+            extra_objs = [_parse_object_identity(o) for o in get_oids[1:]] if operation == "get" else []
+            # rate butuh sysUpTime.0 (bedakan wrap Counter32 dari restart agent) -> ikut diambil
+            need_uptime = want_rates and SYS_UPTIME_OID not in get_oids
+            uptime_obj = _parse_object_identity(SYS_UPTIME_OID) if need_uptime else None
         results = []
+        uptime_rows = []
+        iterator = None
+
+        sec_key = security_key(version, community, v3_cfg)
+        if stream:
+            # Mode streaming tidak menyimpan ke Firestore (hasil tidak ditampung utuh)
+            gen = _stream_walk(sec, sec_key, ip, port, target_obj, page_size, meta, request_id, t0,
+                               adaptive, probe)
+            streaming = True  # generator yang menyelesaikan / melepas probe breaker
+            return Response(stream_with_context(gen), mimetype="application/x-ndjson")
 
         if operation == "get":
-            iterator = getCmd(SnmpEngine(), sec, target, ContextData(), target_obj)
-        elif operation == "getnext":
-            iterator = nextCmd(SnmpEngine(), sec, target, ContextData(), target_obj, lexicographicMode=False)
-        elif operation == "set":
-            if not setValue:
-                return _error(400, "SET requires 'setValue'", request_id)
-            val_to_set = OctetString(str(setValue).encode("utf-8"))
-            iterator = setCmd(SnmpEngine(), sec, target, ContextData(), ObjectType(ObjectIdentity(oid), val_to_set))
-        elif operation == "walk":
-            iterator = bulkCmd(SnmpEngine(), sec, target, ContextData(), 0, page_size, target_obj, lexicographicMode=False)
-
-        for errorIndication, errorStatus, errorIndex, varBinds in iterator:
-            if errorIndication:
-                return _error(500, f"SNMP errorIndication: {errorIndication}", request_id)
-            if errorStatus:
-                return _error(500, f"SNMP errorStatus: {errorStatus.prettyPrint()}", request_id)
-            for oid_result, val_result in varBinds:
+            def load():
                 try:
-                    # Resolve MIB name bila tersedia
-                    name = ObjectIdentity(str(oid_result)).resolveWithMib(None).getMibSymbol()[1]
-                except Exception:
-                    name = str(oid_result)
-                results.append({
-                    "oid": str(oid_result),
-                    "name": name,
-                    "value": str(val_result),
-                    "type": val_result.__class__.__name__,
-                })
-            if operation in ("get", "set", "getnext"):
-                break
+                    with engine_pool.lease(sec_key, (ip, port)) as (engine, target), \
+                            STAGE_SECONDS.time(STAGE_RTT):
+                        res, err = _get_batched(engine, sec, target, [target_obj] + extra_objs
+                                                + ([uptime_obj] if need_uptime else []))
+                    if err is None:
+                        res = _to_results(res)
+                except Exception as e:
+                    res, err = None, str(e)
+                # dicatat sekali oleh leader yang benar-benar menghubungi agent; request yang ikut
+                # (coalesced) / cache hit tidak boleh menutup circuit dengan data lama
+                if err:
+                    _record_snmp_failure((ip, port), err)
+                else:
+                    breaker.record_success((ip, port))
+                return (res, err), err is None
+
+            # N dashboard yang polling OID sama -> satu query SNMP
+            load_oids = get_oids + [SYS_UPTIME_OID] if need_uptime else get_oids
+            (results, err), meta["cache"] = response_cache.get_or_load((ip, port), sec_key, load_oids, load)
+            if err:
+                return _error(500, err, request_id)
+            if need_uptime:
+                uptime_rows = [r for r in results if r["oid"] == SYS_UPTIME_OID]
+                results = [r for r in results if r["oid"] != SYS_UPTIME_OID]
+        else:
+            with engine_pool.lease(sec_key, (ip, port)) as (engine, target), \
+                    STAGE_SECONDS.time(STAGE_RTT):
+                if operation == "getnext":
+                    iterator = hlapi.nextCmd(engine, sec, target, hlapi.ContextData(), target_obj, lexicographicMode=False)
+                elif operation == "set":
+                    val_to_set = hlapi.OctetString(str(setValue).encode("utf-8"))
+                    iterator = hlapi.setCmd(engine, sec, target, hlapi.ContextData(), hlapi.ObjectType(hlapi.ObjectIdentity(oid), val_to_set))
+                elif operation == "walk":
+                    results, err, shrink = _walk_collect(engine, sec, target, target_obj, page_size)
+                    if adaptive and _tune_failure(ip, port, page_size, shrink):
+                        # tooBig tanpa data -> aman diulang sekali dengan halaman lebih kecil;
+                        # timeout tidak diulang (retry sudah di transport, hanya menambah latensi)
+                        if shrink == "tooBig" and not results:
+                            page_size = bulk_tuner.get((ip, port))
+                            meta["pageSize"] = page_size
+                            results, err, shrink = _walk_collect(engine, sec, target, target_obj, page_size)
+                            _tune_failure(ip, port, page_size, shrink)
+                    if err:
+                        return _snmp_fail((ip, port), err, request_id)
+                    if adaptive:
+                        bulk_tuner.success((ip, port), page_size)
+                    if need_uptime:
+                        # gagal ambil uptime tidak menggagalkan walk; rate jadi baseline baru saja
+                        uptime_raw, _ = _get_batched(engine, sec, target, [uptime_obj])
+                        uptime_rows = uptime_raw or []
+
+                for errorIndication, errorStatus, errorIndex, varBinds in iterator or []:
+                    if errorIndication:
+                        return _snmp_fail((ip, port), f"SNMP errorIndication: {errorIndication}", request_id)
+                    if errorStatus:
+                        return _snmp_fail((ip, port), f"SNMP errorStatus: {errorStatus.prettyPrint()}", request_id)
+                    results.extend(varBinds)
+                    if operation in ("set", "getnext"):
+                        break
 
-        rows = _normalize_rows(results, ip, port)
+            # resolusi nama MIB di luar timer RTT (lease engine sudah dilepas)
+            results = _to_results(results)
+            uptime_rows = _to_results(uptime_rows)
+            if operation == "set":
+                response_cache.invalidate((ip, port), oid)
+
+        # rows dibangun lazy: format kolom/msgpack tidak perlu dict per row
+        with STAGE_SECONDS.time(STAGE_NORMALIZE):
+            rows = _normalize_batch(results, ip, port)
+        # hasil dari cache = sampel lama; jangan dihitung ulang sebagai sampel baru
+        if want_rates and meta.get("cache", "miss") == "miss":
+            meta["rates"] = rate_engine.rates_for(f"{ip}:{port}", results + uptime_rows, time.time())
         latency_ms = int((time.time() - t0) * 1000)
         meta["latency_ms"] = latency_ms
         meta["requestId"]  = request_id
         ok, msg = _save_to_firestore(meta, results, rows)
-        print(f"[request {request_id}] save_to_firestore -> {ok} | {msg}")
-        return jsonify({"meta": meta, "results": results, "rows": rows}), 200
+        log.debug("save_to_firestore", extra={"ok": ok, "detail": msg})
+        if operation != "get":  # GET: dicatat di loader (hanya kalau agent benar-benar dihubungi)
+            breaker.record_success((ip, port))
+        return build_response(meta, results, rows, fmt, include_results)
 
     except Exception as e:
-        return _error(500, str(e), request_id)
+        return _snmp_fail((ip, port), str(e), request_id)
+    finally:
+        if not streaming:
+            breaker.release((ip, port), probe)
+
+# ---- Bulk poll banyak agent (NDJSON streaming) ----
+@snmp_bp.post("/snmp/poll")
+def bulk_poll():
+    """
+    Body: {"targets": [{"ip", "port", "version", "community", "v3"}, ...], "oids": [...]}
+    Response: NDJSON, satu baris per target begitu hasilnya datang.
+    """
+    request_id = _get_request_id()
+    if not request.is_json:
+        return _error(415, "Content-Type must be application/json", request_id)
+
+    data = request.get_json() or {}
+    targets = data.get("targets")
+    oids = data.get("oids") or list(PROTOCOL_TEMPLATE.keys())
+    if not isinstance(targets, list) or not targets:
+        return _error(400, "'targets' must be a non-empty list", request_id)
+    if len(targets) > POLL_MAX_TARGETS:
+        return _error(400, f"Too many targets (max {POLL_MAX_TARGETS})", request_id)
+    if not isinstance(oids, list) or not all(str(o).strip() for o in oids):
+        return _error(400, "'oids' must be a list of OIDs", request_id)
+    oids = [str(o).strip() for o in oids]
+    targets = [t if isinstance(t, dict) else {"ip": t} for t in targets]
+
+    log.debug("snmp poll", extra={"targets": len(targets), "oids": len(oids), "dummy": USE_DUMMY})
+
+    def generate():
+        for item in _poll_targets(targets, oids):
+            item["requestId"] = request_id
+            yield json.dumps(item) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+# ---- Data time-series dari scheduler (tanpa network) ----
+def _series_target():
+    ip = request.args.get("ip")
+    port = request.args.get("port", "161")
+    return f"{ip}:{port}" if ip else None
+
+@snmp_bp.get("/series")
+def series_targets():
+    return {"targets": series_store.targets(), "scheduler": poll_scheduler.stats()}, 200
+
+@snmp_bp.get("/series/latest")
+def series_latest():
+    request_id = _get_request_id()
+    target = _series_target()
+    if not target:
+        return _error(400, "Missing 'ip' parameter", request_id)
+    return {"target": target, "metrics": series_store.latest(target), "requestId": request_id}, 200
+
+@snmp_bp.get("/series/rates")
+def series_rates():
+    """Rate per detik terakhir untuk counter target ini (diisi oleh /snmp dengan "rates": true)."""
+    request_id = _get_request_id()
+    target = _series_target()
+    if not target:
+        return _error(400, "Missing 'ip' parameter", request_id)
+    return {"target": target, "rates": rate_engine.latest(target), "requestId": request_id}, 200
+
+@snmp_bp.get("/series/history")
+def series_history():
+    request_id = _get_request_id()
+    target = _series_target()
+    metric = request.args.get("metric")
+    if not target or not metric:
+        return _error(400, "Missing 'ip' or 'metric' parameter", request_id)
+    try:
+        window = float(request.args.get("window", "300"))
+    except ValueError:
+        return _error(400, "'window' must be a number of seconds", request_id)
+
+    data = series_store.window(target, metric, since=time.time() - window)
+    if data is None:
+        return _error(404, f"No samples for {metric} on {target}", request_id)
+    return {"target": target, "metric": metric, "window": window, **data, "requestId": request_id}, 200
+
+@snmp_bp.get("/series/rollup")
+def series_rollup():
+    """
+    Agregat min/max/avg/count per `step` detik untuk [start, end) (epoch detik).
+    Default: 24 jam terakhir, step 60 detik. Step otomatis diperbesar supaya
+    jumlah titik tidak melebihi ROLLUP_MAX_POINTS.
+    """
+    request_id = _get_request_id()
+    target = _series_target()
+    metric = request.args.get("metric")
+    if not target or not metric:
+        return _error(400, "Missing 'ip' or 'metric' parameter", request_id)
+    try:
+        end = float(request.args.get("end", time.time()))
+        start = float(request.args.get("start", end - 24 * 3600))
+        step = float(request.args.get("step", "60"))
+    except ValueError:
+        return _error(400, "'start', 'end' and 'step' must be numbers", request_id)
+    if end <= start or step <= 0:
+        return _error(400, "Invalid time range", request_id)
+
+    step = max(step, (end - start) / ROLLUP_MAX_POINTS)
+    data = rollup_store.query(target, metric, start, end, step)
+    if data is None:
+        return _error(404, f"No samples for {metric} on {target}", request_id)
+    return {"target": target, "metric": metric, "start": start, "end": end, **data, "requestId": request_id}, 200
+
+# ---- Trap/inform yang baru diterima ----
+@snmp_bp.get("/traps/recent")
+def traps_recent():
+    request_id = _get_request_id()
+    try:
+        limit = int(request.args.get("limit", "100"))
+    except ValueError:
+        return _error(400, "'limit' must be an integer", request_id)
+    return {"traps": trap_receiver.latest(limit), "stats": trap_receiver.stats(), "requestId": request_id}, 200
@@ -0,0 +1,103 @@
+# app/scheduler.py
+import time
+import atexit
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .series import SeriesStore
+from .log import get_logger
+
+log = get_logger("scheduler")
+
+
+def parse_agents(spec: str, community: str = "public", version: str = "v2c") -> List[Dict]:
+    """'10.0.0.1,10.0.0.2:1161' -> [{"ip", "port", "community", "version"}, ...]"""
+    agents = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        ip, _, port = part.partition(":")
+        agents.append({"ip": ip, "port": int(port or 161), "community": community, "version": version})
+    return agents
+
+
+class PollScheduler:
+    """
+    Poll `oids` dari semua `agents` tiap `interval` detik di background thread
+    dan simpan nilai numerik ke `store` (ring buffer per target+metric).
+
+    `poll_fn(targets, oids)` harus yield item {"meta": {...}, "rows": [...]}
+    (format yang sama dengan FanOutPoller / endpoint /snmp/poll).
+    Kalau `rollup` diberikan, sampel juga masuk ke RollupStore.
+
+    Key metric = `metric_names[oid]` (nama template), kalau tidak ada pakai OID numerik;
+    nama hasil resolve MIB tidak dipakai karena beberapa OID bisa resolve ke node yang sama.
+    """
+
+    def __init__(self, store: SeriesStore, agents: List[Dict], oids: List[str],
+                 poll_fn: Callable[[List[Dict], List[str]], Iterable[Dict]], interval: float = 5.0,
+                 rollup=None, metric_names: Optional[Dict[str, str]] = None):
+        self.store = store
+        self.rollup = rollup
+        self.agents = agents
+        self.oids = oids
+        self.metric_names = metric_names or {}
+        self.poll_fn = poll_fn
+        self.interval = max(0.1, interval)
+        self._stop = threading.Event()
+        self._thread = None
+        self.cycles = 0
+        self.samples = 0
+        self.errors = 0
+        self.last_cycle_ms = None
+
+    def poll_once(self):
+        t0 = time.time()
+        for item in self.poll_fn(self.agents, self.oids):
+            meta = item.get("meta") or {}
+            if "error" in item:
+                self.errors += 1
+                continue
+            target = f"{meta.get('ip')}:{meta.get('port')}"
+            now = time.time()
+            samples = []
+            for row in item.get("rows") or []:
+                if isinstance(row.get("value"), (int, float)):
+                    oid = row.get("oid")
+                    metric = self.metric_names.get(oid) or oid or row["name"]
+                    value = float(row["value"])
+                    self.store.add(target, metric, now, value)
+                    samples.append((metric, value))
+            if self.rollup is not None and samples:
+                self.rollup.add_rows(target, now, samples)
+            self.samples += len(samples)
+        self.cycles += 1
+        self.last_cycle_ms = int((time.time() - t0) * 1000)
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.errors += 1
+                log.warning("poll cycle failed", extra={"error": str(e)})
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        if self._thread is None and self.agents:
+            self._thread = threading.Thread(target=self._run, name="snmp-scheduler", daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "agents": len(self.agents), "interval": self.interval,
+            "cycles": self.cycles, "samples": self.samples, "errors": self.errors,
+            "lastCycleMs": self.last_cycle_ms,
+        }
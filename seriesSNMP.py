@@ -0,0 +1,86 @@
+# app/series.py
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+
+class RingBuffer:
+    """Buffer melingkar kapasitas tetap: timestamp (epoch detik) + nilai float, disimpan di array('d')."""
+
+    __slots__ = ("capacity", "ts", "values", "_head", "_size")
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.ts = array("d", bytes(8 * self.capacity))
+        self.values = array("d", bytes(8 * self.capacity))
+        self._head = 0   # index tulis berikutnya
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, ts: float, value: float):
+        self.ts[self._head] = ts
+        self.values[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        if not self._size:
+            return None
+        i = (self._head - 1) % self.capacity
+        return self.ts[i], self.values[i]
+
+    def _ordered(self) -> Tuple[array, array]:
+        if self._size < self.capacity:
+            return self.ts[:self._size], self.values[:self._size]
+        h = self._head
+        return self.ts[h:] + self.ts[:h], self.values[h:] + self.values[:h]
+
+    def window(self, since: float = 0.0) -> Tuple[List[float], List[float]]:
+        """Sampel dengan ts >= since, urut lama -> baru."""
+        ts, values = self._ordered()
+        i = bisect_left(ts, since)
+        return ts[i:].tolist(), values[i:].tolist()
+
+
+class SeriesStore:
+    """Kumpulan RingBuffer per (target, metric), thread-safe."""
+
+    def __init__(self, capacity: int = 3600):
+        self.capacity = capacity
+        self._buffers: Dict[Tuple[str, str], RingBuffer] = {}
+        self._lock = threading.Lock()
+
+    def add(self, target: str, metric: str, ts: float, value: float):
+        with self._lock:
+            buf = self._buffers.get((target, metric))
+            if buf is None:
+                buf = self._buffers[(target, metric)] = RingBuffer(self.capacity)
+            buf.append(ts, value)
+
+    def latest(self, target: str) -> Dict[str, Dict]:
+        with self._lock:
+            out = {}
+            for (t, metric), buf in self._buffers.items():
+                last = buf.latest() if t == target else None
+                if last is not None:
+                    out[metric] = {"ts": last[0], "value": last[1]}
+            return out
+
+    def window(self, target: str, metric: str, since: float = 0.0) -> Optional[Dict[str, List[float]]]:
+        with self._lock:
+            buf = self._buffers.get((target, metric))
+            if buf is None:
+                return None
+            ts, values = buf.window(since)
+        return {"ts": ts, "values": values}
+
+    def targets(self) -> Dict[str, List[str]]:
+        with self._lock:
+            out: Dict[str, List[str]] = {}
+            for t, metric in self._buffers:
+                out.setdefault(t, []).append(metric)
+            return out
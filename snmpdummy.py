@@ -1,11 +1,37 @@
+"""
+Simulator agent SNMP untuk benchmark (localhost saja).
+
+Satu SnmpEngine melayani banyak agent virtual: satu per (port, community). Semua agent
+berbagi satu pohon OID hasil generate (system group, ifTable N baris, OID sensor app),
+jadi memori tidak tumbuh dengan jumlah agent. GET, GETNEXT, GETBULK dan SET dijawab dari
+index OID terurut (bisect + range read), counter diupdate live oleh background thread,
+latency dan packet loss bisa disuntikkan.
+
+    python snmpdummy.py                                   # 127.0.0.1:16100, community public
+    python snmpdummy.py --ports 16100-16999 --communities public,private --if-rows 100000
+    python snmpdummy.py --latency-ms 20 --jitter-ms 10 --loss 0.01
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+
 from pysnmp.entity import engine, config
-from pysnmp.carrier.asyncore.dgram import udp
+from pysnmp.carrier.asyncio.dgram import udp
 from pysnmp.entity.rfc3413 import cmdrsp, context
 from pysnmp.proto.api import v2c
 
-# Dummy data
-
 #hacktoberfest2025
+START_TIME = time.time()
+
+SNMP_ERR_NO_CREATION = 11
+
+MAX_BULK_VARBINDS = 500  # batas satu respons GETBULK (hindari tooBig di datagram UDP)
+
+# Dummy data lama (tetap dilayani supaya client yang sudah ada tidak berubah)
 data = {
     '1.3.6.1.4.1.53864.10.1.0': 23050,
     '1.3.6.1.4.1.53864.10.2.0': 1234,
@@ -13,34 +39,354 @@ data = {
     '1.3.6.1.4.1.53864.30.1.0': 0
 }
 
-snmpEngine = engine.SnmpEngine()
-config.addV1System(snmpEngine, 'psn', 'public')  # v2c public community
-config.addTransport(
-    snmpEngine,
-    udp.domainName,
-    udp.UdpTransport().openServerMode(('0.0.0.0', 16100))  # pakai port 16100 biar gak butuh admin
-)
-
-def get_cb(snmpEngine, stateReference, contextEngineId, contextName,
-           varBinds, cbCtx):
-    resultBinds = []
-    for oid, val in varBinds:
-        oid_str = '.'.join([str(x) for x in oid])
-        if oid_str in data:
-            resultBinds.append((oid, v2c.Integer(data[oid_str])))
+SYS = (1, 3, 6, 1, 2, 1, 1)
+IF_NUMBER = (1, 3, 6, 1, 2, 1, 2, 1, 0)
+IF_ENTRY = (1, 3, 6, 1, 2, 1, 2, 2, 1)
+SENSOR = (1, 3, 6, 1, 4, 1, 9999, 1, 2)  # PROTOCOL_TEMPLATE backend
+
+
+def _oid(s: str):
+    return tuple(int(x) for x in s.strip('.').split('.'))
+
+
+class OidIndex:
+    """
+    OID (tuple int) -> (syntax, value). Kunci disimpan terurut (list tuple), jadi
+    next-lookup dan range read = satu bisect, O(log n).
+
+    Update nilai (`set`) tidak mengunci: mengganti satu entry dict atomik di bawah GIL,
+    jadi simulator di background thread bisa jalan bersamaan dengan walk. Hanya
+    penambahan/penghapusan OID (mengubah urutan kunci) yang memakai lock.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def add(self, oid, syntax, value):
+        with self._lock:
+            if oid not in self.values:
+                if not self.keys or oid > self.keys[-1]:
+                    self.keys.append(oid)
+                else:
+                    self.keys.insert(bisect_left(self.keys, oid), oid)
+            self.values[oid] = (syntax, value)
+
+    def remove(self, oid):
+        with self._lock:
+            if self.values.pop(oid, None) is not None:
+                del self.keys[bisect_left(self.keys, oid)]
+
+    def set(self, oid, value):
+        """Ganti nilai OID yang sudah ada (syntax tetap). Return False kalau OID tidak ada."""
+        entry = self.values.get(oid)
+        if entry is None:
+            return False
+        self.values[oid] = (entry[0], value)
+        return True
+
+    def get(self, oid):
+        return self.values.get(oid)
+
+    def next(self, oid):
+        """OID pertama yang > oid, atau None kalau sudah akhir MIB."""
+        i = bisect_right(self.keys, oid)
+        return self.keys[i] if i < len(self.keys) else None
+
+    def range(self, oid, count):
+        """Sampai `count` OID berurutan setelah `oid` (satu bisect + slice, untuk GETBULK)."""
+        i = bisect_right(self.keys, oid)
+        return self.keys[i:i + count]
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class LiveUpdater:
+    """
+    Background thread yang menaikkan counter ifTable (wrap 2^32) dan sesekali mengubah
+    ifOperStatus, lewat OidIndex.set. Laju per OID disimpan di array supaya ringkas.
+    """
+
+    def __init__(self, tree: OidIndex, interval: float = 1.0, flap: float = 0.0):
+        self.tree = tree
+        self.interval = interval
+        self.flap = flap
+        self.counters = []             # OID counter
+        self.rates = array('l')        # kenaikan per detik, sejajar dengan counters
+        self.status = []               # OID ifOperStatus
+        self.ticks = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def track_counter(self, oid, rate):
+        self.counters.append(oid)
+        self.rates.append(rate)
+
+    def track_iftable(self, if_rows: int):
+        """ifInOctets/ifOutOctets naik dengan laju = nilai awalnya; ifOperStatus ikut flap."""
+        for row in range(1, if_rows + 1):
+            for col in (10, 16):
+                oid = IF_ENTRY + (col, row)
+                self.track_counter(oid, self.tree.get(oid)[1])
+            self.status.append(IF_ENTRY + (8, row))
+
+    def tick(self, dt: float):
+        values = self.tree.values
+        for oid, rate in zip(self.counters, self.rates):
+            syntax, v = values[oid]
+            values[oid] = (syntax, (v + int(rate * dt)) % 2**32)
+        if self.flap and self.status:
+            for oid in random.sample(self.status, max(1, int(len(self.status) * self.flap))):
+                self.tree.set(oid, 2 if self.tree.get(oid)[1] == 1 else 1)
+        self.ticks += 1
+
+    def _run(self):
+        last = time.monotonic()
+        while not self._stop.wait(self.interval):
+            now = time.monotonic()
+            self.tick(now - last)
+            last = now
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name='snmpdummy-updater', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def build_tree(if_rows: int) -> OidIndex:
+    """
+    Pohon OID sintetis. Nilai boleh callable(agent) -> dihitung saat dibaca (sysUpTime,
+    sysName per agent, nilai sensor); counter ifTable berupa int biasa yang dinaikkan `updater`.
+    """
+    idx = OidIndex()
+    idx.add(SYS + (1, 0), v2c.OctetString, 'pysnmp dummy agent (simulator)')
+    idx.add(SYS + (2, 0), v2c.ObjectIdentifier, (1, 3, 6, 1, 4, 1, 53864))
+    idx.add(SYS + (3, 0), v2c.TimeTicks, lambda agent: int((time.time() - START_TIME) * 100) % 2**32)
+    idx.add(SYS + (4, 0), v2c.OctetString, 'noc@localhost')
+    idx.add(SYS + (5, 0), v2c.OctetString, lambda agent: f'agent-{agent[0]}-{agent[1]}')
+    idx.add(SYS + (6, 0), v2c.OctetString, 'lab')
+    idx.add(SYS + (7, 0), v2c.Integer, 72)
+
+    idx.add(IF_NUMBER, v2c.Integer, if_rows)
+    # octet counter naik dengan laju beda per baris supaya rate tidak datar
+    rate = lambda row: 1000 + (row * 7919) % 100000
+    columns = (
+        (1, v2c.Integer, lambda row: row),
+        (2, v2c.OctetString, lambda row: f'eth{row - 1}'),
+        (3, v2c.Integer, lambda row: 6),
+        (4, v2c.Integer, lambda row: 1500),
+        (5, v2c.Gauge32, lambda row: 1000000000),
+        (7, v2c.Integer, lambda row: 1),
+        (8, v2c.Integer, lambda row: 1 if row % 10 else 2),
+        (10, v2c.Counter32, lambda row: rate(row)),  # nilai awal = laju/detik (dipakai LiveUpdater)
+        (14, v2c.Counter32, lambda row: 0),
+        (16, v2c.Counter32, lambda row: rate(row) // 2),
+        (20, v2c.Counter32, lambda row: 0),
+    )
+    # kolom demi kolom = urutan leksikografis, jadi add() selalu append
+    for col, syntax, make in columns:
+        for row in range(1, if_rows + 1):
+            idx.add(IF_ENTRY + (col, row), syntax, make(row))
+
+    for i, (lo, hi) in enumerate(((20.0, 30.0), (40.0, 70.0), (700.0, 800.0), (0.5, 2.0))):
+        idx.add(SENSOR + (i,), v2c.OctetString, lambda agent, lo=lo, hi=hi: f'{random.uniform(lo, hi):.2f}')
+
+    idx.add(_oid('1.3.6.1.4.1.53864.1.0'), v2c.OctetString, 'dummy-device')  # deviceName (flaskapi)
+    for oid_str, value in data.items():
+        idx.add(_oid(oid_str), v2c.Integer, value)
+    return idx
+
+
+class Simulator:
+    def __init__(self, tree: OidIndex, latency_ms=0.0, jitter_ms=0.0, loss=0.0):
+        self.tree = tree
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.loss = loss
+        self.requests = 0
+        self.dropped = 0
+
+    def _value(self, oid, agent):
+        entry = self.tree.get(oid)
+        if entry is None:
+            return v2c.NoSuchInstance()
+        syntax, value = entry
+        return syntax(value(agent) if callable(value) else value)
+
+    def get(self, oids, agent):
+        return [(v2c.ObjectIdentifier(o), self._value(o, agent)) for o in oids]
+
+    def next(self, oid, agent):
+        nxt = self.tree.next(oid)
+        if nxt is None:
+            return v2c.ObjectIdentifier(oid), v2c.EndOfMibView()
+        return v2c.ObjectIdentifier(nxt), self._value(nxt, agent)
+
+    def bulk(self, oids, non_repeaters, max_repetitions, agent):
+        out = [self.next(o, agent) for o in oids[:non_repeaters]]
+        repeaters = list(oids[non_repeaters:])
+        if not repeaters:
+            return out
+        max_repetitions = min(max_repetitions, max(1, (MAX_BULK_VARBINDS - len(out)) // len(repeaters)))
+        # satu range read per repeater, lalu disusun baris demi baris seperti urutan GETBULK
+        columns = [self.tree.range(o, max_repetitions) for o in repeaters]
+        for r in range(max_repetitions):
+            ended = 0
+            for o, col in zip(repeaters, columns):
+                if r < len(col):
+                    out.append((v2c.ObjectIdentifier(col[r]), self._value(col[r], agent)))
+                else:
+                    out.append((v2c.ObjectIdentifier(col[-1] if col else o), v2c.EndOfMibView()))
+                    ended += 1
+            if ended == len(repeaters):
+                break
+        return out
+
+    def set(self, varBinds):
+        """
+        SET hanya untuk OID yang sudah ada (nilai bersama semua agent); syntax ikut nilai
+        yang dikirim. Return (errorStatus, errorIndex).
+        """
+        for i, (oid, _) in enumerate(varBinds, 1):
+            if self.tree.get(tuple(oid)) is None:
+                return SNMP_ERR_NO_CREATION, i
+        for oid, val in varBinds:
+            self.tree.add(tuple(oid), val.__class__, val)
+        return 0, 0
+
+    def reply(self, responder, snmpEngine, stateReference, varBinds, errorStatus=0, errorIndex=0):
+        """Kirim respons dengan latency/loss yang disuntikkan."""
+        self.requests += 1
+        if self.loss and random.random() < self.loss:
+            self.dropped += 1
+            responder.releaseStateInformation(stateReference)
+            return
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            asyncio.get_event_loop().call_later(
+                delay, responder.send, snmpEngine, stateReference, varBinds, errorStatus, errorIndex
+            )
         else:
-            resultBinds.append((oid, v2c.NoSuchInstance()))
-    snmpEngine.observer.storeExecutionContext(stateReference, 'responseVarBinds', resultBinds)
+            responder.send(snmpEngine, stateReference, varBinds, errorStatus, errorIndex)
+
+
+def _agent(snmpEngine, contextName):
+    """(port, community) agent tujuan request; port diambil dari transportDomain."""
+    ctx = snmpEngine.observer.getExecutionContext('rfc3412.receiveMessage:request')
+    return ctx['transportDomain'][-1], str(contextName)
+
+
+class _ResponderMixin:
+    simulator: Simulator = None
+
+    def send(self, snmpEngine, stateReference, varBinds, errorStatus=0, errorIndex=0):
+        self.sendVarBinds(snmpEngine, stateReference, errorStatus, errorIndex, varBinds)
+        self.releaseStateInformation(stateReference)
+
+
+class GetResponder(_ResponderMixin, cmdrsp.GetCommandResponder):
+    def handleMgmtOperation(self, snmpEngine, stateReference, contextName, PDU, acInfo):
+        oids = [tuple(o) for o, _ in v2c.apiPDU.getVarBinds(PDU)]
+        rsp = self.simulator.get(oids, _agent(snmpEngine, contextName))
+        self.simulator.reply(self, snmpEngine, stateReference, rsp)
+
+
+class NextResponder(_ResponderMixin, cmdrsp.NextCommandResponder):
+    def handleMgmtOperation(self, snmpEngine, stateReference, contextName, PDU, acInfo):
+        agent = _agent(snmpEngine, contextName)
+        rsp = [self.simulator.next(tuple(o), agent) for o, _ in v2c.apiPDU.getVarBinds(PDU)]
+        self.simulator.reply(self, snmpEngine, stateReference, rsp)
+
+
+class BulkResponder(_ResponderMixin, cmdrsp.BulkCommandResponder):
+    def handleMgmtOperation(self, snmpEngine, stateReference, contextName, PDU, acInfo):
+        oids = [tuple(o) for o, _ in v2c.apiBulkPDU.getVarBinds(PDU)]
+        rsp = self.simulator.bulk(
+            oids, int(v2c.apiBulkPDU.getNonRepeaters(PDU)), int(v2c.apiBulkPDU.getMaxRepetitions(PDU)),
+            _agent(snmpEngine, contextName),
+        )
+        self.simulator.reply(self, snmpEngine, stateReference, rsp)
+
+
+class SetResponder(_ResponderMixin, cmdrsp.SetCommandResponder):
+    def handleMgmtOperation(self, snmpEngine, stateReference, contextName, PDU, acInfo):
+        varBinds = v2c.apiPDU.getVarBinds(PDU)
+        errorStatus, errorIndex = self.simulator.set(varBinds)
+        self.simulator.reply(self, snmpEngine, stateReference, varBinds, errorStatus, errorIndex)
+
+
+def _ports(spec: str):
+    ports = []
+    for part in spec.split(','):
+        if '-' in part:
+            lo, hi = part.split('-', 1)
+            ports.extend(range(int(lo), int(hi) + 1))
+        elif part.strip():
+            ports.append(int(part))
+    return ports
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SNMP dummy agent simulator (localhost)')
+    parser.add_argument('--ports', default='16100', help='mis. 16100 atau 16100-16199,17000')
+    parser.add_argument('--communities', default='public', help='dipisah koma; tiap community = agent sendiri')
+    parser.add_argument('--if-rows', type=int, default=16, help='jumlah baris ifTable')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--loss', type=float, default=0.0, help='probabilitas request tidak dijawab (0..1)')
+    parser.add_argument('--update-interval', type=float, default=1.0,
+                        help='detik antar update counter di background (0 = nilai statis)')
+    parser.add_argument('--flap', type=float, default=0.0, help='porsi ifOperStatus yang dibalik per update')
+    args = parser.parse_args()
+
+    ports = _ports(args.ports)
+    communities = [c.strip() for c in args.communities.split(',') if c.strip()]
+
+    t0 = time.time()
+    tree = build_tree(args.if_rows)
+    updater = LiveUpdater(tree, args.update_interval, args.flap)
+    updater.track_iftable(args.if_rows)
+    updater.start()
+    print(f"[OK] generated {len(tree)} OIDs in {time.time() - t0:.2f}s "
+          f"(live counters={len(updater.counters)} every {args.update_interval}s)")
+
+    _ResponderMixin.simulator = Simulator(tree, args.latency_ms, args.jitter_ms, args.loss)
+
+    snmpEngine = engine.SnmpEngine()
+    for community in communities:
+        # contextName = community -> responder tahu agent mana yang dituju
+        config.addV1System(snmpEngine, f'c-{community}', community, contextName=community)
+    for port in ports:
+        # hanya loopback; domain per port supaya port tujuan terbaca di responder
+        config.addTransport(
+            snmpEngine,
+            udp.domainName + (port,),
+            udp.UdpTransport().openServerMode(('127.0.0.1', port))
+        )
+
+    snmpContext = context.SnmpContext(snmpEngine)
+    GetResponder(snmpEngine, snmpContext)
+    NextResponder(snmpEngine, snmpContext)
+    BulkResponder(snmpEngine, snmpContext)
+    SetResponder(snmpEngine, snmpContext)
+
+    print(f"[OK] SNMP dummy agent running @ 127.0.0.1 ports={args.ports} "
+          f"communities={','.join(communities)} agents={len(ports) * len(communities)} (v1/v2c)")
+    snmpEngine.transportDispatcher.jobStarted(1)
 
-snmpContext = context.SnmpContext(snmpEngine)
-cmdrsp.GetCommandResponder(snmpEngine, snmpContext)
-cmdrsp.GetNextCommandResponder(snmpEngine, snmpContext)
+    try:
+        snmpEngine.transportDispatcher.runDispatcher()
+    except KeyboardInterrupt:
+        snmpEngine.transportDispatcher.closeDispatcher()
+        updater.stop()
+        sim = _ResponderMixin.simulator
+        print(f"Agent stopped. requests={sim.requests} dropped={sim.dropped}")
 
-print("[OK] SNMP dummy agent running @ 127.0.0.1:16100 (v2c, community=public)")
-snmpEngine.transportDispatcher.jobStarted(1)
 
-try:
-    snmpEngine.transportDispatcher.runDispatcher()
-except KeyboardInterrupt:
-    snmpEngine.transportDispatcher.closeDispatcher()
-    print("Agent stopped.")
+if __name__ == '__main__':
+    main()
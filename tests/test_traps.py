@@ -0,0 +1,74 @@
+# tests/test_traps.py
+"""TrapReceiver di localhost (port ephemeral): trap v2c + inform, enrichment, delivery, ack inform."""
+import threading
+
+import pytest
+
+hlapi = pytest.importorskip("pysnmp.hlapi")
+pytest.importorskip("flask")  # app.helpers
+
+from app.traps import TrapReceiver, SNMP_TRAP_OID
+
+TEMPERATURE_OID = "1.3.6.1.4.1.9999.1.2.0"
+COLD_START_OID = "1.3.6.1.6.3.1.1.5.1"
+
+
+@pytest.fixture
+def receiver():
+    rcv = TrapReceiver(host="127.0.0.1", port=0, communities=("public",), flush_interval=0.05)
+    rcv.start()
+    yield rcv
+    rcv.stop()
+
+
+def _send(port, kind):
+    notification = hlapi.NotificationType(hlapi.ObjectIdentity(COLD_START_OID)).addVarBinds(
+        (TEMPERATURE_OID, hlapi.Integer32(25))
+    )
+    errorIndication, errorStatus, _, _ = next(hlapi.sendNotification(
+        hlapi.SnmpEngine(), hlapi.CommunityData("public"),
+        hlapi.UdpTransportTarget(("127.0.0.1", port), timeout=2, retries=1),
+        hlapi.ContextData(), kind, notification,
+    ))
+    return errorIndication, errorStatus
+
+
+def test_trap_and_inform_are_enriched_delivered_and_acked(receiver):
+    events, done = [], threading.Event()
+
+    def on_events(batch):
+        events.extend(batch)
+        if len(events) >= 2:
+            done.set()
+
+    receiver.subscribe(on_events)
+    assert receiver.port != 0
+
+    errorIndication, errorStatus = _send(receiver.port, "trap")
+    assert errorIndication is None and not errorStatus
+    errorIndication, errorStatus = _send(receiver.port, "inform")
+    assert errorIndication is None, f"inform not acknowledged: {errorIndication}"
+    assert not errorStatus
+
+    assert done.wait(5), receiver.stats()
+    assert sorted(ev["meta"]["operation"] for ev in events) == ["inform", "trap"]
+    for ev in events:
+        meta = ev["meta"]
+        assert meta["ip"] == "127.0.0.1" and meta["version"] == "v2c"
+        assert meta["trapOid"] == COLD_START_OID
+        assert meta["trapName"].endswith("::coldStart")
+        assert any(r["oid"] == SNMP_TRAP_OID for r in ev["results"])
+        row = next(r for r in ev["rows"] if r["oid"] == TEMPERATURE_OID)
+        assert row["name"] == "temperature" and row["value"] == 25.0 and row["source"] == "trap"
+
+    stats = receiver.stats()
+    assert stats["received"] == stats["delivered"] == 2
+    assert list(receiver.recent) == events
+
+
+def test_stop_joins_receiver_thread():
+    rcv = TrapReceiver(host="127.0.0.1", port=0)
+    rcv.start()
+    assert rcv.stats()["running"]
+    rcv.stop()
+    assert not rcv.stats()["running"]
@@ -0,0 +1,106 @@
+# tests/test_writer.py
+"""BatchWriter + batched_sink dengan klien Firestore palsu (tanpa Google SDK / jaringan)."""
+import pytest
+
+from app.writer import BatchWriter, batched_sink, FIRESTORE_MAX_BATCH_OPS
+
+
+class FakeWriteBatch:
+    def __init__(self, client):
+        self.client = client
+        self.ops = []
+
+    def set(self, ref, doc):
+        self.ops.append((ref, doc))
+
+    def commit(self):
+        if self.client.fail_commits:
+            self.client.fail_commits -= 1
+            raise RuntimeError("commit failed")
+        self.client.commits.append(len(self.ops))
+        for ref, doc in self.ops:
+            self.client.docs[ref.path] = doc
+
+
+class FakeDocRef:
+    def __init__(self, path):
+        self.path = path
+
+
+class FakeCollection:
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+
+    def document(self):
+        self.client.next_id += 1
+        return FakeDocRef(f"{self.path}/{self.client.next_id}")
+
+
+class FakeFirestore:
+    def __init__(self, fail_commits=0):
+        self.docs = {}
+        self.commits = []
+        self.next_id = 0
+        self.fail_commits = fail_commits
+
+    def collection(self, path):
+        return FakeCollection(self, path)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+
+def _payload(i):
+    return {"ip": "10.0.0.1", "port": 161, "operation": "get",
+            "rows": [{"oid": "1.3.6.1.4.1.9999.1.2.0", "name": "temperature", "value": float(i)}]}
+
+
+def test_batched_sink_one_commit_per_drained_batch():
+    db = FakeFirestore()
+    writer = BatchWriter(batched_sink(db, "artifacts/app/public/data/readings"),
+                         flush_size=100, flush_interval=5.0)
+    for i in range(250):
+        assert writer.submit(_payload(i))
+    writer.close()
+
+    assert writer.stats()["written"] == 250
+    assert sum(db.commits) == 250
+    assert len(db.commits) == writer.stats()["batches"] <= 3
+    assert all(path.startswith("artifacts/app/public/data/readings/") for path in db.docs)
+    assert sorted(d["rows"][0]["value"] for d in db.docs.values()) == [float(i) for i in range(250)]
+
+
+def test_batched_sink_splits_at_firestore_limit_and_shapes_docs():
+    db = FakeFirestore()
+    sink = batched_sink(db, "readings", to_doc=lambda p: {**p, "serverTimestamp": "ts"})
+    ok, msg = sink([_payload(i) for i in range(FIRESTORE_MAX_BATCH_OPS + 1)])
+
+    assert ok, msg
+    assert db.commits == [FIRESTORE_MAX_BATCH_OPS, 1]
+    doc = next(iter(db.docs.values()))
+    assert doc["serverTimestamp"] == "ts"
+    assert "results" not in doc
+
+
+def test_batched_sink_reports_failed_commit():
+    db = FakeFirestore(fail_commits=1)
+    ok, msg = batched_sink(db, "readings", max_ops=2)([_payload(i) for i in range(3)])
+
+    assert not ok
+    assert msg.startswith("2/3 failed")
+    assert db.commits == [1]
+
+
+def test_helpers_sink_prefers_client_batch():
+    pytest.importorskip("flask")
+    from app.helpers import _make_firestore_sink
+
+    calls = []
+    db = FakeFirestore()
+    sink = _make_firestore_sink(lambda payload, app_id: calls.append(payload) or (True, "ok"), db)
+    ok, _ = sink([_payload(1), _payload(2)])
+
+    assert ok and not calls
+    assert db.commits == [2]
+    assert all("serverTimestamp" in d for d in db.docs.values())
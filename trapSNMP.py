@@ -0,0 +1,234 @@
+# app/traps.py
+"""
+Penerima trap/inform SNMP (v1, v2c, v3).
+
+Thread receiver hanya mengambil varbind mentah + alamat pengirim lalu memasukkannya ke
+BatchWriter (antrian terbatas). Thread writer yang melakukan enrichment per batch
+(_varbind_to_result + _normalize_batch / PROTOCOL_TEMPLATE) lalu mengirim ke subscriber
+in-process, ring `recent`, dan `forward` (mis. Firestore).
+"""
+import time
+import atexit
+import socket
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from .helpers import _varbind_to_result, _normalize_batch, _usm_protocols, oid_resolver
+from .writer import BatchWriter, POLICY_DROP_OLDEST
+from .lazy import LazyModule
+from .log import get_logger
+
+log = get_logger("traps")
+
+# receiver default nonaktif: pysnmp baru dimuat saat start()
+engine = LazyModule("pysnmp.entity.engine")
+config = LazyModule("pysnmp.entity.config")
+udp = LazyModule("pysnmp.carrier.asyncore.dgram.udp")
+ntfrcv = LazyModule("pysnmp.entity.rfc3413.ntfrcv")
+v2c = LazyModule("pysnmp.proto.api.v2c")
+
+SNMP_TRAP_OID = "1.3.6.1.6.3.1.1.4.1.0"
+SECURITY_MODELS = {1: "v1", 2: "v2c", 3: "v3"}
+RCVBUF_BYTES = 4 * 1024 * 1024  # buffer kernel besar supaya burst tidak hilang sebelum dibaca
+
+
+def parse_v3_users(spec: str) -> List[Dict]:
+    """
+    'user:SHA:authpass:AES128:privpass@80001f88...,user2:MD5:authpass' -> [{...}].
+    engineID (hex) pengirim wajib untuk trap v3; inform memakai engineID receiver.
+    """
+    users = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        part, _, engine_id = part.partition("@")
+        fields = part.split(":")
+        users.append({
+            "user": fields[0],
+            "authProto": (fields[1] if len(fields) > 1 else "NONE").upper(),
+            "authKey": fields[2] if len(fields) > 2 else "",
+            "privProto": (fields[3] if len(fields) > 3 else "NONE").upper(),
+            "privKey": fields[4] if len(fields) > 4 else "",
+            "engineId": engine_id or None,
+        })
+    return users
+
+
+class TrapReceiver:
+    def __init__(self, host: str = "0.0.0.0", port: int = 162, communities=("public",),
+                 v3_users: Optional[List[Dict]] = None, forward: Optional[Callable[[Dict], object]] = None,
+                 max_queue: int = 50000, flush_size: int = 500, flush_interval: float = 0.5,
+                 policy: str = POLICY_DROP_OLDEST, recent: int = 1000):
+        self.host, self.port = host, port
+        self.communities = list(communities)
+        self.v3_users = v3_users or []
+        self.forward = forward
+        self.queue_args = dict(max_queue=max_queue, flush_size=flush_size,
+                               flush_interval=flush_interval, policy=policy)
+        self.recent: deque = deque(maxlen=max(1, recent))
+        self._subscribers: List[Callable[[List[Dict]], None]] = []
+        self._lock = threading.Lock()
+        self._engine = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._job_active = False
+        self.writer: Optional[BatchWriter] = None
+        self.received = 0
+        self.decode_errors = 0
+        self.delivered = 0
+        self.subscriber_errors = 0
+        self.forward_errors = 0
+
+    # ---------- subscriber API ----------
+    def subscribe(self, fn: Callable[[List[Dict]], None]) -> Callable[[], None]:
+        """`fn(events)` dipanggil per batch di thread writer. Return fungsi unsubscribe."""
+        with self._lock:
+            self._subscribers.append(fn)
+
+        def unsubscribe():
+            with self._lock:
+                if fn in self._subscribers:
+                    self._subscribers.remove(fn)
+        return unsubscribe
+
+    # ---------- receiver thread ----------
+    def _on_notification(self, snmpEngine, stateReference, contextEngineId, contextName,
+                         varBinds, cbCtx):
+        # jalur panas: tanpa resolusi MIB / normalisasi, cukup masukkan ke antrian
+        self.received += 1
+        try:
+            ctx = snmpEngine.observer.getExecutionContext("rfc3412.receiveMessage:request")
+            address = ctx["transportAddress"]
+            pdu = ctx.get("pdu")
+            kind = "inform" if pdu is not None and pdu.tagSet == v2c.InformRequestPDU.tagSet else "trap"
+            raw = (time.time(), str(address[0]), int(address[1]),
+                   SECURITY_MODELS.get(ctx.get("securityModel"), "v2c"), kind, list(varBinds))
+        except Exception:
+            self.decode_errors += 1
+            return
+        self.writer.submit(raw)
+
+    def _build_engine(self):
+        snmpEngine = engine.SnmpEngine()
+        transport = udp.UdpTransport().openServerMode((self.host, self.port))
+        try:
+            transport.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF_BYTES)
+        except (AttributeError, OSError):
+            pass
+        self.port = transport.socket.getsockname()[1]  # port 0 -> port yang dipilih kernel
+        config.addTransport(snmpEngine, udp.domainName, transport)
+        for community in self.communities:
+            config.addV1System(snmpEngine, f"trap-{community}", community)
+        for u in self.v3_users:
+            auth_p, priv_p = _usm_protocols(u["authProto"], u["privProto"])
+            kwargs = {}
+            if u.get("engineId"):
+                kwargs["securityEngineId"] = v2c.OctetString(hexValue=u["engineId"])
+            config.addV3User(snmpEngine, u["user"], auth_p, u["authKey"] or None,
+                             priv_p, u["privKey"] or None, **kwargs)
+        ntfrcv.NotificationReceiver(snmpEngine, self._on_notification)
+        return snmpEngine
+
+    def _check_stop(self, time_now):
+        # timer dispatcher: jalan di thread receiver, jadi jobFinished tidak dipanggil lintas thread
+        if self._stop.is_set() and self._job_active:
+            self._job_active = False
+            self._engine.transportDispatcher.jobFinished(1)
+
+    def _run(self):
+        dispatcher = self._engine.transportDispatcher
+        dispatcher.jobStarted(1)
+        self._job_active = True
+        dispatcher.registerTimerCbFun(self._check_stop)
+        try:
+            dispatcher.runDispatcher()
+        except Exception as e:
+            log.error("trap receiver stopped", extra={"error": str(e)})
+        finally:
+            dispatcher.closeDispatcher()
+
+    # ---------- writer thread ----------
+    def _enrich(self, raw) -> Dict:
+        received_at, ip, port, version, kind, varBinds = raw
+        results = [_varbind_to_result(o, v) for o, v in varBinds]
+        trap_oid = next((r["value"] for r in results if r["oid"] == SNMP_TRAP_OID), None)
+        trap_name = oid_resolver.oid_to_name(trap_oid) if trap_oid else None
+        meta = {
+            "ip": ip, "port": port, "operation": kind, "version": version,
+            "trapOid": trap_oid, "trapName": trap_name,
+            "ts": datetime.fromtimestamp(received_at, timezone.utc).isoformat(),
+            "source": "trap",
+        }
+        rows = _normalize_batch(results, ip, port).rows()
+        for row in rows:
+            row["source"] = "trap"
+        return {"meta": meta, "results": results, "rows": rows}
+
+    def _deliver(self, batch: List) -> tuple:
+        events = []
+        for raw in batch:
+            try:
+                events.append(self._enrich(raw))
+            except Exception:
+                self.decode_errors += 1
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for fn in subscribers:
+            try:
+                fn(events)
+            except Exception as e:
+                self.subscriber_errors += 1
+                log.warning("trap subscriber failed", extra={"error": str(e)})
+        if self.forward is not None:
+            for ev in events:
+                try:
+                    self.forward(ev)
+                except Exception:
+                    self.forward_errors += 1
+        self.recent.extend(events)
+        self.delivered += len(events)
+        return True, f"{len(events)} delivered"
+
+    # ---------- lifecycle ----------
+    def start(self):
+        if self._thread is not None:
+            return
+        self.writer = BatchWriter(self._deliver, **self.queue_args)
+        self._engine = self._build_engine()
+        self._thread = threading.Thread(target=self._run, name="snmp-trap-receiver", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        log.info("trap receiver listening", extra={
+            "host": self.host, "port": self.port, "communities": len(self.communities),
+            "v3Users": len(self.v3_users),
+        })
+
+    def stop(self, timeout: float = 5.0):
+        """Minta thread receiver berhenti (dicek tiap tick timer dispatcher), tunggu, lalu kosongkan antrian."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.writer is not None:
+            self.writer.close()
+
+    def latest(self, limit: int = 100) -> List[Dict]:
+        items = list(self.recent)
+        return items[-limit:] if limit > 0 else []
+
+    def stats(self) -> Dict:
+        queue = self.writer.stats() if self.writer else None
+        return {
+            "running": bool(self._thread and self._thread.is_alive()),
+            "listen": f"{self.host}:{self.port}",
+            "received": self.received,
+            "delivered": self.delivered,
+            "dropped": queue["dropped"] if queue else 0,
+            "decodeErrors": self.decode_errors,
+            "subscriberErrors": self.subscriber_errors,
+            "forwardErrors": self.forward_errors,
+            "subscribers": len(self._subscribers),
+            "queue": queue,
+        }
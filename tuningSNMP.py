@@ -0,0 +1,88 @@
+# app/tuning.py
+import math
+import time
+import threading
+from typing import Dict, Tuple
+
+
+class BulkTuner:
+    """
+    Belajar max-repetitions GETBULK per target (ip, port).
+
+    - sukses  -> naik `grow` kali (tidak melewati ceiling)
+    - tooBig  -> turun `shrink` kali, dan nilai yang gagal jadi ceiling
+    - timeout -> turun `shrink` kali, ceiling tidak berubah (timeout belum tentu karena ukuran PDU)
+    Ceiling tidak permanen: naik `grow` kali setelah `probe_after` sukses beruntun di ceiling,
+    dan kembali ke `max_reps` kalau sudah `ceiling_ttl` detik sejak tooBig terakhir.
+    Nilai yang dipelajari kadaluarsa setelah `ttl` detik tanpa update.
+    """
+
+    def __init__(self, initial: int = 50, min_reps: int = 1, max_reps: int = 200,
+                 grow: float = 1.25, shrink: float = 0.5, ttl: float = 3600.0,
+                 probe_after: int = 20, ceiling_ttl: float = 900.0):
+        self.initial = initial
+        self.min_reps = min_reps
+        self.max_reps = max_reps
+        self.grow = grow
+        self.shrink = shrink
+        self.ttl = ttl
+        self.probe_after = max(1, probe_after)
+        self.ceiling_ttl = ceiling_ttl
+        self._state: Dict[Tuple, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _clamp(self, v: int) -> int:
+        return max(self.min_reps, min(self.max_reps, int(v)))
+
+    def _entry_locked(self, key: Tuple, now: float) -> Dict:
+        e = self._state.get(key)
+        if e is None or now - e["updated"] > self.ttl:
+            e = {"value": self._clamp(self.initial), "ceiling": self.max_reps, "ceiling_at": 0.0,
+                 "streak": 0, "successes": 0, "failures": 0, "updated": now}
+            self._state[key] = e
+        elif e["ceiling"] < self.max_reps and now - e["ceiling_at"] > self.ceiling_ttl:
+            e["ceiling"] = self.max_reps
+        return e
+
+    def get(self, key: Tuple) -> int:
+        with self._lock:
+            return self._entry_locked(key, time.monotonic())["value"]
+
+    def success(self, key: Tuple, used: int):
+        with self._lock:
+            now = time.monotonic()
+            e = self._entry_locked(key, now)
+            e["streak"] += 1
+            if used >= e["ceiling"] and e["streak"] >= self.probe_after:
+                # agent stabil di ceiling: coba lagi satu langkah di atasnya
+                e["ceiling"] = self._clamp(math.ceil(e["ceiling"] * self.grow))
+                e["streak"] = 0
+            grown = self._clamp(math.ceil(used * self.grow))
+            e["value"] = max(e["value"], min(grown, e["ceiling"]))
+            e["successes"] += 1
+            e["updated"] = now
+
+    def failure(self, key: Tuple, used: int, too_big: bool = True):
+        """`too_big` False (timeout): halaman dikecilkan tanpa menurunkan ceiling."""
+        with self._lock:
+            now = time.monotonic()
+            e = self._entry_locked(key, now)
+            if too_big:
+                e["ceiling"] = self._clamp(used - 1)
+                e["ceiling_at"] = now
+            e["value"] = min(e["ceiling"], self._clamp(math.floor(used * self.shrink)))
+            e["streak"] = 0
+            e["failures"] += 1
+            e["updated"] = now
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                f"{k[0]}:{k[1]}": {
+                    "maxRepetitions": e["value"], "ceiling": e["ceiling"],
+                    "successes": e["successes"], "failures": e["failures"],
+                    "ageSec": round(now - e["updated"], 1),
+                }
+                for k, e in self._state.items() if now - e["updated"] <= self.ttl
+            }
@@ -0,0 +1,167 @@
+# app/usm.py
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .engine import _fingerprint
+from .lazy import LazyModule
+
+hlapi = LazyModule("pysnmp.hlapi")
+snmp_config = LazyModule("pysnmp.entity.config")
+rfc1902 = LazyModule("pysnmp.proto.rfc1902")
+
+
+class UsmContextCache:
+    """
+    Cache konteks keamanan SNMPv3 antar request.
+
+    - master key (hash passphrase RFC 3414, ~1 MB hashing per key) dihitung sekali per
+      (user, protokol, fingerprint key), bukan sekali per SnmpEngine baru
+    - kalau engineID agent sudah diketahui (dipelajari dari respons lewat `watch`), key
+      dilokalisasi sekali per (user, protokol, fingerprint, engineID) dan UsmUserData dipakai ulang
+    - engineID kadaluarsa setelah `engine_id_ttl` atau di-`forget` saat request ke target gagal
+      (agent diganti/di-reset -> discovery ulang)
+
+    Key cache hanya memakai fingerprint; raw key dan key turunan tidak pernah keluar dari
+    objek ini (stats hanya berisi hitungan).
+    """
+
+    def __init__(self, max_entries: int = 1024, engine_id_ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.engine_id_ttl = engine_id_ttl
+        self._masters: "OrderedDict[Tuple, Tuple]" = OrderedDict()
+        self._objects: "OrderedDict[Tuple, hlapi.UsmUserData]" = OrderedDict()
+        self._engine_ids: Dict[Tuple, Tuple["rfc1902.OctetString", float]] = {}
+        self._lock = threading.Lock()
+        self.master_hits = 0
+        self.master_misses = 0
+        self.hits = 0
+        self.misses = 0
+        self.engine_ids_learned = 0
+        self.engine_ids_forgotten = 0
+
+    # ---------- engineID per target ----------
+    def watch(self, engine):
+        """Daftarkan observer di SnmpEngine untuk mencatat engineID agent dari respons v3."""
+        engine.observer.registerObserver(self._observe, "rfc3412.prepareDataElements:internal")
+        return engine
+
+    def _observe(self, snmpEngine, execpoint, variables, cbCtx):
+        if variables.get("securityModel") != 3:
+            return
+        engine_id = variables.get("securityEngineId")
+        address = variables.get("transportAddress")
+        if engine_id and address:
+            self.learn((str(address[0]), int(address[1])), engine_id)
+
+    def learn(self, target: Tuple, engine_id):
+        with self._lock:
+            known = self._engine_ids.get(target)
+            if known is None or known[0] != engine_id:
+                self.engine_ids_learned += 1
+            self._engine_ids[target] = (rfc1902.OctetString(engine_id), time.monotonic())
+
+    def forget(self, target: Tuple):
+        with self._lock:
+            if self._engine_ids.pop(tuple(target), None) is not None:
+                self.engine_ids_forgotten += 1
+
+    def engine_id(self, target: Optional[Tuple]) -> Optional["rfc1902.OctetString"]:
+        if target is None:
+            return None
+        with self._lock:
+            entry = self._engine_ids.get(tuple(target))
+            if entry is None:
+                return None
+            if time.monotonic() - entry[1] > self.engine_id_ttl:
+                del self._engine_ids[tuple(target)]
+                return None
+            return entry[0]
+
+    # ---------- key & UsmUserData ----------
+    def _lru_get(self, store: OrderedDict, key):
+        value = store.get(key)
+        if value is not None:
+            store.move_to_end(key)
+        return value
+
+    def _lru_put(self, store: OrderedDict, key, value):
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_entries:
+            store.popitem(last=False)
+
+    def _master_keys(self, base: Tuple, auth_p, priv_p, auth_key: str, priv_key: str) -> Tuple:
+        with self._lock:
+            masters = self._lru_get(self._masters, base)
+            if masters is not None:
+                self.master_hits += 1
+                return masters
+            self.master_misses += 1
+        # hashing di luar lock; dua thread yang balapan hanya menghitung dua kali
+        auth_master = snmp_config.authServices[auth_p].hashPassphrase(auth_key)
+        priv_master = None
+        if priv_p is not hlapi.usmNoPrivProtocol:
+            priv_master = snmp_config.privServices[priv_p].hashPassphrase(auth_p, priv_key)
+        masters = (auth_master, priv_master)
+        with self._lock:
+            self._lru_put(self._masters, base, masters)
+        return masters
+
+    def user_data(self, user: str, auth_p, priv_p, auth_key: str = "", priv_key: str = "",
+                  target: Optional[Tuple] = None) -> "hlapi.UsmUserData":
+        """UsmUserData siap pakai: key localized kalau engineID target diketahui, selain itu master key."""
+        if auth_p is hlapi.usmNoAuthProtocol:
+            return hlapi.UsmUserData(user)
+
+        base = (user, auth_p, priv_p, _fingerprint(auth_key, priv_key if priv_p is not hlapi.usmNoPrivProtocol else ""))
+        engine_id = self.engine_id(target)
+        key = base + (engine_id.asOctets() if engine_id is not None else None,)
+        with self._lock:
+            obj = self._lru_get(self._objects, key)
+            if obj is not None:
+                self.hits += 1
+                return obj
+            self.misses += 1
+
+        auth_master, priv_master = self._master_keys(base, auth_p, priv_p, auth_key, priv_key)
+        kwargs = {"authProtocol": auth_p}
+        if engine_id is None:
+            auth, priv, key_type = auth_master, priv_master, hlapi.usmKeyTypeMaster
+        else:
+            auth = snmp_config.authServices[auth_p].localizeKey(auth_master, engine_id)
+            priv = None
+            if priv_master is not None:
+                priv = snmp_config.privServices[priv_p].localizeKey(auth_p, priv_master, engine_id)
+            key_type = hlapi.usmKeyTypeLocalized
+            kwargs["securityEngineId"] = engine_id
+        kwargs["authKeyType"] = key_type
+        if priv is not None:
+            kwargs.update(privKey=priv, privProtocol=priv_p, privKeyType=key_type)
+        obj = hlapi.UsmUserData(user, auth, **kwargs)
+
+        with self._lock:
+            self._lru_put(self._objects, key, obj)
+        return obj
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / total, 4) if total else None,
+                "masterKeyHits": self.master_hits,
+                "masterKeyMisses": self.master_misses,
+                "entries": len(self._objects),
+                "engineIds": len(self._engine_ids),
+                "engineIdsLearned": self.engine_ids_learned,
+                "engineIdsForgotten": self.engine_ids_forgotten,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._masters.clear()
+            self._objects.clear()
+            self._engine_ids.clear()
@@ -0,0 +1,197 @@
+# app/writer.py
+import math
+import time
+import atexit
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .log import get_logger
+
+log = get_logger("writer")
+
+POLICY_BLOCK = "block"
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_DROP_NEWEST = "drop_newest"
+
+FIRESTORE_MAX_BATCH_OPS = 500  # batas operasi per WriteBatch Firestore
+
+
+def per_item_sink(save_one: Callable) -> Callable[[List[Dict]], Tuple[bool, str]]:
+    """Bungkus fungsi simpan satu dokumen (mis. save_sensor_data_to_cloud) jadi sink batch."""
+    def sink(batch: List[Dict]):
+        failed = 0
+        last_msg = ""
+        for payload in batch:
+            ok, last_msg = save_one(payload)
+            if not ok:
+                failed += 1
+        if failed:
+            return False, f"{failed}/{len(batch)} failed: {last_msg}"
+        return True, f"{len(batch)} saved"
+    return sink
+
+
+def batched_sink(client, collection: str, to_doc: Optional[Callable[[Dict], Dict]] = None,
+                 max_ops: int = FIRESTORE_MAX_BATCH_OPS) -> Callable[[List[Dict]], Tuple[bool, str]]:
+    """
+    Sink batch untuk klien Firestore (`client.batch()` / `client.collection()`): semua payload
+    hasil drain ditulis lewat WriteBatch, satu commit per `max_ops` dokumen, bukan satu
+    round-trip per dokumen. `to_doc(payload)` membentuk isi dokumen (default payload apa adanya).
+    """
+    col = client.collection(collection)
+    max_ops = max(1, min(max_ops, FIRESTORE_MAX_BATCH_OPS))
+
+    def sink(batch: List[Dict]):
+        failed = 0
+        last_err = ""
+        for i in range(0, len(batch), max_ops):
+            chunk = batch[i:i + max_ops]
+            wb = client.batch()
+            for payload in chunk:
+                wb.set(col.document(), to_doc(payload) if to_doc else payload)
+            try:
+                wb.commit()
+            except Exception as e:
+                failed += len(chunk)
+                last_err = str(e)
+        commits = math.ceil(len(batch) / max_ops)
+        if failed:
+            return False, f"{failed}/{len(batch)} failed: {last_err}"
+        return True, f"{len(batch)} saved in {commits} commit(s)"
+    return sink
+
+
+class BatchWriter:
+    """
+    Antrian persistensi di background thread.
+
+    `submit()` tidak pernah menunggu cloud write; payload dikumpulkan lalu
+    dikirim ke `sink(batch)` tiap `flush_size` item atau tiap `flush_interval` detik.
+    Kalau antrian penuh (`max_queue`), perilaku mengikuti `policy`:
+      - block       : tunggu maks `block_timeout` detik, lalu drop item baru
+      - drop_oldest : buang item paling lama
+      - drop_newest : buang item baru
+    """
+
+    def __init__(self, sink: Callable[[List[Dict]], Tuple[bool, str]], max_queue: int = 10000,
+                 flush_size: int = 100, flush_interval: float = 1.0,
+                 policy: str = POLICY_DROP_OLDEST, block_timeout: float = 0.5):
+        if policy not in (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_DROP_NEWEST):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.sink = sink
+        self.max_queue = max(1, max_queue)
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._inflight = 0
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name="batch-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, payload: Dict) -> bool:
+        """Masukkan payload ke antrian. Return False kalau payload di-drop."""
+        with self._cond:
+            if self._closed:
+                self.dropped += 1
+                return False
+            if len(self._queue) >= self.max_queue:
+                if self.policy == POLICY_DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                elif self.policy == POLICY_DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                else:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._queue) >= self.max_queue and not self._closed:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    if len(self._queue) >= self.max_queue or self._closed:
+                        self.dropped += 1
+                        return False
+            self._queue.append(payload)
+            self.enqueued += 1
+            if len(self._queue) >= self.flush_size:
+                self._cond.notify_all()
+            return True
+
+    def _take_batch(self) -> List[Dict]:
+        with self._cond:
+            deadline = time.monotonic() + self.flush_interval
+            while len(self._queue) < self.flush_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            n = min(len(self._queue), self.flush_size)
+            batch = [self._queue.popleft() for _ in range(n)]
+            self._inflight = len(batch)
+            if batch:
+                self._cond.notify_all()  # bangunkan submit() yang sedang block
+            return batch
+
+    def _write(self, batch: List[Dict]):
+        try:
+            ok, msg = self.sink(batch)
+        except Exception as e:
+            ok, msg = False, str(e)
+        with self._cond:
+            self._inflight = 0
+            self.batches += 1
+            if ok:
+                self.written += len(batch)
+            else:
+                self.failed += len(batch)
+        if not ok:
+            log.warning("batch write failed", extra={"size": len(batch), "error": msg})
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+            with self._cond:
+                if self._closed and not self._queue:
+                    return
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Tunggu sampai antrian kosong. Return True kalau berhasil dalam `timeout`."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+        while time.monotonic() < deadline:
+            with self._cond:
+                if not self._queue and not self._inflight:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def close(self, timeout: float = 10.0):
+        """Tolak item baru, kirim sisa antrian, lalu hentikan thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "queued": len(self._queue), "maxQueue": self.max_queue,
+                "enqueued": self.enqueued, "written": self.written,
+                "failed": self.failed, "dropped": self.dropped,
+                "batches": self.batches, "policy": self.policy,
+            }